@@ -43,12 +43,26 @@ import dask.array as da
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib import rc
+from matplotlib.colorbar import ColorbarBase
+from matplotlib.colors import BoundaryNorm
 from .plot_utils import equal_area_grid, Polarsubplot
-from .sh_utils import legendre, getG0, getG0_dipole, get_ground_field_G0
+from .sh_utils import _legendre_array, _legendre_coefficients, getG0, getG0_dipole, get_ground_field_G0
 from .model_utils import get_model_vectors, get_m_matrix, get_m_matrix_pol, get_coeffs, default_coeff_fn, get_truncation_levels
+from scipy.linalg.blas import get_blas_funcs
 from functools import reduce
 from builtins import range
 
+try:
+    import numba
+    from numba import prange
+except ImportError: # numba is optional, and only used to speed up calculations at custom coordinates
+    numba = None
+
+try:
+    import cupy
+except ImportError: # cupy is optional, and only used with backend = 'cupy'
+    cupy = None
+
 
 
 rc('text', usetex=False)
@@ -56,8 +70,222 @@ rc('text', usetex=False)
 MU0   = 4*np.pi*1e-7 # Permeability constant
 REFRE = 6371.2 # Reference radius used in geomagnetic modeling
 
+d2r   = np.pi/180 # degrees to radians
+mlt2r = np.pi/12  # magnetic local time to radians
+
 DEFAULT = object()
 
+# Legendre functions and trigonometric terms at custom coordinates are cached for inputs
+# with at most _CACHE_MAX_POINTS points, and at most _CACHE_MAX_ENTRIES sets of coordinates:
+_CACHE_MAX_POINTS  = 1000
+_CACHE_MAX_ENTRIES = 8
+
+# replaces cos(mlat) where it is zero or not finite in the 1/cos(mlat) terms, see _secant:
+_MIN_COSLAMBDA = 1e-12
+
+
+def _cos_sin_mphi(m, mlt, xp = np):
+    """ return cos(m * phi) and sin(m * phi), with phi = mlt * pi/12
+
+    m is a (1, K) array of non-negative integer orders, and mlt is an array with a trailing 
+    axis of length 1. cos(phi) and sin(phi) are the only trigonometric functions that are 
+    evaluated. The higher orders, up to max(m), follow from the angle addition formulas, and 
+    the columns are then picked out in the order of m. The arrays are made with the array 
+    module xp (numpy or cupy)
+    """
+
+    phi = xp.asarray(mlt) * mlt2r
+    c1, s1 = xp.cos(phi), xp.sin(phi)
+
+    cos, sin = [xp.ones_like(c1), c1], [xp.zeros_like(s1), s1]
+    for _ in range(2, int(np.max(m)) + 1):
+        c, s = cos[-1], sin[-1]
+        cos.append(c1 * c - s1 * s)
+        sin.append(s1 * c + c1 * s)
+
+    index = xp.asarray(np.ravel(m))
+    return xp.concatenate(cos, axis = -1)[..., index], xp.concatenate(sin, axis = -1)[..., index]
+
+
+def _cs_scale(scale):
+    """ return (1, K) row of scale factors as a (2K, 1) column that matches 
+        coefficient vectors stacked as (cos terms, sin terms)
+    """
+
+    return np.tile(scale, 2).T
+
+
+def _design_matrix(P, cosmphi, sinmphi):
+    """ return [P cos(m phi), P sin(m phi)]
+
+    The matrix is written directly into a Fortran ordered array, so that each column is 
+    contiguous in memory, which is the layout that BLAS gemv works on without transposing
+    """
+
+    K = P.shape[1]
+    A = np.empty((P.shape[0], 2 * K), dtype = np.result_type(P, cosmphi), order = 'F')
+    np.multiply(P, cosmphi, out = A[:, :K])
+    np.multiply(P, sinmphi, out = A[:, K:])
+
+    return A
+
+
+def _secant(mlat):
+    """ return 1/cos(mlat), with mlat in degrees. cos(mlat) is replaced by _MIN_COSLAMBDA only 
+        where it is exactly zero or not finite. cos(+-90 degrees) is small but nonzero in floating 
+        point, so the values at the poles are the same as with 1/cos(mlat)
+    """
+
+    coslambda = np.cos(np.asarray(mlat) * d2r)
+    return 1. / np.where((coslambda != 0) & np.isfinite(coslambda), coslambda, _MIN_COSLAMBDA)
+
+
+def _packed_current_matrix(P, dP, m, seclambda, cosmphi, sinmphi, dtype = np.float64):
+    """ return the (2N, 2K) matrix 
+
+        [[ dP cos(m phi)               , dP sin(m phi)               ],
+         [ P m sin(m phi) / cos(lambda), -P m cos(m phi) / cos(lambda)]]
+
+    which gives both horizontal components of a current from one product with stacked 
+    (cos terms, sin terms) coefficients. The first N rows give the component that depends 
+    on dP, and the last N rows the component that depends on P m / cos(lambda)
+    """
+
+    N, K = P.shape
+    A = np.empty((2 * N, 2 * K), dtype = dtype, order = 'F')
+    np.multiply(dP, cosmphi, out = A[:N, :K])
+    np.multiply(dP, sinmphi, out = A[:N, K:])
+
+    Pm = P * m * seclambda
+    np.multiply( Pm, sinmphi, out = A[N:, :K])
+    np.multiply(-Pm, cosmphi, out = A[N:, K:])
+
+    return A
+
+
+def _sh_sum(P, cosmphi, sinmphi, c, s, grid = False):
+    """ 
+    Calculate sum_k P[:, k] * (c[k] * cos(m_k phi) + s[k] * sin(m_k phi))
+
+    If grid is False, P and the trigonometric arrays are (N, K), and the output is (N, 1). 
+    If grid is True, P is (Nlat, K), cosmphi and sinmphi are (Nmlt, K), and the output 
+    is (Nlat, Nmlt, 1), with all combinations of the two sets of coordinates. Any scale 
+    factors should be folded into the (K, 1) coefficient vectors c and s, so that no 
+    scaled copies of P are made
+    """
+
+    if grid:
+        return (  np.einsum('ik,jk,kt->ijt', P, cosmphi, c, optimize = True) 
+                + np.einsum('ik,jk,kt->ijt', P, sinmphi, s, optimize = True) )
+
+    # the cos and sin terms share one (N, K) buffer for the elementwise products:
+    buf = np.multiply(P, cosmphi)
+    out = buf.dot(c)
+    np.multiply(P, sinmphi, out = buf)
+    out += buf.dot(s)
+
+    return out
+
+
+def _evaluate_field(mlat, mlt, c_P, s_P, c_dP, s_dP, n, m, a, b, d):
+    """ 
+    Calculate sum_k P_k (c_P[k] cos(m_k phi) + s_P[k] sin(m_k phi)) and the same 
+    sum with dP_k = dP_k/dtheta and coefficients c_dP, s_dP, at each point (mlat, mlt)
+
+    P_k is the Schmidt semi-normalized Legendre function of degree n[k] and order m[k], found
+    with the same recursion and coefficients a, b, d as in sh_utils.legendre. cos(m phi) and 
+    sin(m phi) are found with the angle addition formulas. This is done one point at a time, 
+    so that no (N, K) arrays are made. The function is compiled with numba if it is available.
+    """
+
+    npts, K, T = mlat.size, n.size, c_P.shape[1]
+    nmax, mmax = a.shape[0] - 1, a.shape[1] - 1
+    sum_P  = np.zeros((npts, T))
+    sum_dP = np.zeros((npts, T))
+
+    for i in prange(npts):
+        sinth = np.cos(mlat[i] * d2r) # theta is colatitude
+        costh = np.sin(mlat[i] * d2r)
+        cosphi, sinphi = np.cos(mlt[i] * mlt2r), np.sin(mlt[i] * mlt2r)
+
+        P  = np.zeros((nmax + 1, mmax + 1))
+        dP = np.zeros((nmax + 1, mmax + 1))
+        P[0, 0] = 1.
+        for mm in range(min(nmax, mmax) + 1):
+            if mm > 0:
+                P[mm, mm]  = d[mm] * sinth * P[mm - 1, mm - 1]
+                dP[mm, mm] = d[mm] * (sinth * dP[mm - 1, mm - 1] + costh * P[mm - 1, mm - 1])
+            for nn in range(mm + 1, nmax + 1):
+                P[nn, mm]  = a[nn, mm] * costh * P[nn - 1, mm]
+                dP[nn, mm] = a[nn, mm] * (costh * dP[nn - 1, mm] - sinth * P[nn - 1, mm])
+                if nn > mm + 1:
+                    P[nn, mm]  -= b[nn, mm] * P[nn - 2, mm]
+                    dP[nn, mm] -= b[nn, mm] * dP[nn - 2, mm]
+
+        cosmphi = np.empty(mmax + 1)
+        sinmphi = np.empty(mmax + 1)
+        cosmphi[0], sinmphi[0] = 1., 0.
+        for mm in range(1, mmax + 1):
+            cosmphi[mm] = cosmphi[mm - 1] * cosphi - sinmphi[mm - 1] * sinphi
+            sinmphi[mm] = sinmphi[mm - 1] * cosphi + cosmphi[mm - 1] * sinphi
+
+        for k in range(K):
+            cm, sm = cosmphi[m[k]], sinmphi[m[k]]
+            Pk, dPk = P[n[k], m[k]], dP[n[k], m[k]]
+            for t in range(T):
+                sum_P[i, t]  += Pk  * (c_P[k, t]  * cm + s_P[k, t]  * sm)
+                sum_dP[i, t] += dPk * (c_dP[k, t] * cm + s_dP[k, t] * sm)
+
+    return sum_P, sum_dP
+
+
+if numba is not None:
+    _evaluate_field = numba.njit(parallel = True, fastmath = True, cache = True)(_evaluate_field)
+else:
+    _evaluate_field = None
+
+
+def _is_hemisphere_symmetric(mlat, mlt = None):
+    """ return True if the flattened mlat is (mlat_north, -mlat_north), and mlt, if given, 
+        is (mlt_north, mlt_north), which is the structure of the default grids 
+    """
+
+    mlat = np.ravel(mlat)
+    half = mlat.size // 2
+    if mlat.size % 2 != 0 or half == 0 or not np.array_equal(mlat[:half], -mlat[half:]):
+        return False
+    if mlt is not None:
+        mlt = np.ravel(mlt)
+        return np.array_equal(mlt[:half], mlt[half:])
+
+    return True
+
+
+def _split_hemispheres(x, shape = None):
+    """ return the northern and southern halves of x, which has the points of the two hemispheres 
+        stacked along the first axis, as views with the given shape (default is the shape of x 
+        with the first dimension halved)
+    """
+
+    if shape is None:
+        shape = (-1, ) + x.shape[1:]
+
+    x = x.reshape((2, ) + tuple(shape))
+    return x[0], x[1]
+
+
+def _reshape_batch(x, shape):
+    """ reshape x, which has one column per set of model inputs, to shape. If the model 
+        coefficients refer to more than one set of inputs (see AMPS.update_model), the 
+        columns are kept as a trailing dimension. Zero-dimensional results are returned 
+        as scalars
+    """
+
+    if x.shape[-1] > 1:
+        shape = tuple(shape) + x.shape[-1:]
+
+    return x.reshape(shape)[()]
+
 
 class AMPS(object):
     """
@@ -90,6 +318,16 @@ class AMPS(object):
     coeff_fn: str, optional
         file name of model coefficients - must be in format produced by model_vector_to_txt.py
         (default is latest version)
+    precision: str, optional
+        floating point precision of the model vectors and the matrices used on the default 
+        grids, 'float64' (default) or 'float32'. Single precision halves the memory use, and 
+        is accurate enough for plotting (relative errors are ~1e-6)
+    backend: str, optional
+        'numpy' (default) or 'cupy'. With 'cupy', the design matrices of the scalar fields are 
+        kept on the GPU, and the matrix products on scalargrid are done there. In 
+        get_ground_perturbation, the Legendre functions and the sums at custom coordinates are 
+        also evaluated on the GPU. This pays off for high resolution grids and many points. 
+        Outputs are always numpy arrays. Requires cupy
 
 
     Examples
@@ -128,13 +366,18 @@ class AMPS(object):
     Attributes
     ----------
     tor_c : numpy.ndarray
-        vector of cos term coefficents in the toroidal field expansion
+        vector of cos term coefficents in the toroidal field expansion. This and the other 
+        coefficient vectors are (K, T) if update_model was called with arrays of T conditions
     tor_s : numpy.ndarray
         vector of sin term coefficents in the toroidal field expansion
     pol_c : numpy.ndarray
         vector of cos term coefficents in the poloidal field expansion
     pol_s : numpy.ndarray
         vector of sin term coefficents in the poloidal field expansion
+    tor_cs : numpy.ndarray
+        tor_c and tor_s stacked in one vector, consistent with tor_A_scalar
+    pol_cs : numpy.ndarray
+        pol_c and pol_s stacked in one vector, consistent with pol_A_scalar
     keys_P : list
         list of spherical harmonic wave number pairs (n,m) corresponding to elements of pol_c and pol_s 
     keys_T : list
@@ -148,19 +391,30 @@ class AMPS(object):
         (np.hstack((mlat_north, mlat_south)), np.hstack((mlt_north, mlt_south)))
         
         The grids can be changed directly, but member function calculate_matrices() 
-        must then be called for the change to take effect. 
+        must then be called for the change to take effect. The same applies to the 
+        height attribute. 
 
     """
 
-    def __init__(self, v, By, Bz, tilt, f107, minlat = 60, maxlat = 89.99, height = 110., dr = 2, M0 = 4, resolution = 100, coeff_fn = default_coeff_fn):
+    def __init__(self, v, By, Bz, tilt, f107, minlat = 60, maxlat = 89.99, height = 110., dr = 2, M0 = 4, resolution = 100, coeff_fn = default_coeff_fn, precision = 'float64', backend = 'numpy'):
         """ __init__ function for class AMPS
         """
 
+        if backend not in ('numpy', 'cupy'):
+            raise ValueError("backend must be 'numpy' or 'cupy', not {}".format(backend))
+        if backend == 'cupy' and cupy is None:
+            raise ImportError("backend = 'cupy' requires cupy to be installed")
+        if precision not in ('float32', 'float64'):
+            raise ValueError("precision must be 'float32' or 'float64', not {}".format(precision))
+
         self.coeff_fn = coeff_fn
+        self._dtype = np.dtype(precision)
+        self._backend = backend
 
         self._update_inputs(v,By,Bz,tilt,f107,minlat,maxlat,height,dr,M0,resolution)
 
         self.tor_c, self.tor_s, self.pol_c, self.pol_s, self.pol_keys, self.tor_keys = get_model_vectors(v, By, Bz, tilt, f107, coeff_fn = self.coeff_fn)
+        self._stack_model_vectors()
 
         self.height = height
 
@@ -175,22 +429,22 @@ class AMPS(object):
 
         self.keys_P = [c for c in self.pol_keys]
         self.keys_T = [c for c in self.tor_keys]
-        self.m_P = np.array(self.keys_P).T[1][np.newaxis, :]
-        self.m_T = np.array(self.keys_T).T[1][np.newaxis, :]
-        self.n_P = np.array(self.keys_P).T[0][np.newaxis, :]
-        self.n_T = np.array(self.keys_T).T[0][np.newaxis, :]
-
+        # (NED, 2) arrays of n, m. The degrees are small, so int16 is enough:
+        nm_P = np.asarray(self.keys_P, dtype = np.int16)
+        nm_T = np.asarray(self.keys_T, dtype = np.int16)
+        self.n_P, self.m_P = np.ascontiguousarray(nm_P.T)[:, np.newaxis, :] # (1, NED) rows
+        self.n_T, self.m_T = np.ascontiguousarray(nm_T.T)[:, np.newaxis, :]
 
-        # find highest degree and order:
-        self.N, self.M = np.max( np.hstack((np.array([c for c in self.tor_keys]).T, np.array([c for c in self.tor_keys]).T)), axis = 1)
+        # find highest degree and order of both sets of keys:
+        self.N, self.M = map(int, np.vstack((nm_P, nm_T)).max(axis = 0))
 
         self.vectorgrid = self._get_vectorgrid()
         self.scalargrid = self._get_scalargrid(resolution = resolution)
 
-        mlats = np.split(self.scalargrid[0], 2)[0].reshape((self.scalar_resolution, self.scalar_resolution))
-        mlts  = np.split(self.scalargrid[1], 2)[0].reshape((self.scalar_resolution, self.scalar_resolution))
-        mlatv = np.split(self.vectorgrid[0], 2)[0]
-        mltv  = np.split(self.vectorgrid[1], 2)[0]
+        mlats = _split_hemispheres(self.scalargrid[0], (self.scalar_resolution, self.scalar_resolution))[0]
+        mlts  = _split_hemispheres(self.scalargrid[1], (self.scalar_resolution, self.scalar_resolution))[0]
+        mlatv = _split_hemispheres(self.vectorgrid[0])[0]
+        mltv  = _split_hemispheres(self.vectorgrid[1])[0]
 
         self.plotgrid_scalar = (mlats, mlts)
         self.plotgrid_vector = (mlatv, mltv)
@@ -211,17 +465,22 @@ class AMPS(object):
         Update the model vectors without updating all the other matrices. This leads to better
         performance than just making a new AMPS object.
 
+        The inputs can be arrays of T sets of external conditions. The model vectors then get 
+        shape (K, T), and the calculated quantities get an additional, trailing dimension of length T
+        (on scalargrid the scalars are (N, T)), so that the model is evaluated for all conditions 
+        with one matrix-matrix product. The plotting functions require scalar inputs.
+
         Parameters
         ----------
-        v : float
+        v : float or array
             solar wind velocity in km/s
-        By : float
+        By : float or array
             IMF GSM y component in nT
-        Bz : float
+        Bz : float or array
             IMF GSM z component in nT
-        tilt : float
+        tilt : float or array
             dipole tilt angle in degrees
-        f107 : float
+        f107 : float or array
             F10.7 index in s.f.u.
 
         Examples
@@ -239,8 +498,10 @@ class AMPS(object):
         >>> m2 = AMPS(new_v, new_By, new_Bz, new_tilt, new_f107)
         >>> # ... new current calculations ...
         
-        Also note that the inputs are scalars in both cases. It is possible to optimize the calculations significantly
-        by allowing the inputs to be arrays. That is not yet implemented.
+        For a time series of external conditions, it is faster still to pass arrays:
+
+        >>> m1.update_model(v_array, By_array, Bz_array, tilt_array, f107_array)
+        >>> Ju = m1.get_upward_current() # (N, T), one column per set of conditions
 
         """
 
@@ -264,7 +525,29 @@ class AMPS(object):
             self.tor_c, self.tor_s, self.pol_c, self.pol_s, self.pol_keys, self.tor_keys = get_model_vectors(v, By, Bz, tilt, f107, coeff_fn = self.coeff_fn)
         else:
             self.tor_c, self.tor_s, self.pol_c, self.pol_s, self.pol_keys, self.tor_keys = get_model_vectors(v, By, Bz, tilt, f107, coeff_fn = coeff_fn)
-       
+
+        self._stack_model_vectors()
+
+
+    def _stack_model_vectors(self):
+        """ 
+        Stack cos and sin coefficients, so that the scalar fields can be calculated with a 
+        single matrix product with the design matrices made in calculate_matrices
+        """
+
+        self.tor_c, self.tor_s, self.pol_c, self.pol_s = [x.astype(self._dtype, copy = False) for x in (self.tor_c, self.tor_s, self.pol_c, self.pol_s)]
+
+        self.tor_cs = np.vstack((self.tor_c, self.tor_s))
+        self.pol_cs = np.vstack((self.pol_c, self.pol_s))
+
+        # (sin terms, -cos terms), for the d/dphi terms, which swap cos(m phi) and sin(m phi):
+        self._tor_sc = np.vstack((self.tor_s, -self.tor_c))
+        self._pol_sc = np.vstack((self.pol_s, -self.pol_c))
+
+        # the stacked vectors are only rebuilt here, so they should not be changed in place:
+        for x in (self.tor_cs, self.pol_cs, self._tor_sc, self._pol_sc):
+            x.setflags(write = False)
+
 
     def _update_inputs(self,v,By,Bz,tilt,f107,minlat,maxlat,height,dr,M0,resolution):
 
@@ -296,11 +579,11 @@ class AMPS(object):
         mlt  = grid[1] + grid[2]/2. # shift to the center points of the bins
         mlat = grid[0] + self.dr/2  # shift to the center points of the bins
 
-        mlt  = mlt[ (mlat >= self.minlat) & (mlat <= self.maxlat)]# & (mlat <=60 )]
-        mlat = mlat[(mlat >= self.minlat) & (mlat <= self.maxlat)]# & (mlat <= 60)]
+        inside = (mlat >= self.minlat) & (mlat <= self.maxlat)
+        mlat, mlt = mlat[inside], mlt[inside]
 
-        mlat = np.hstack((mlat, -mlat)) # add southern hemisphere points
-        mlt  = np.hstack((mlt ,  mlt)) # add southern hemisphere points
+        mlat = np.concatenate((mlat, -mlat)) # add southern hemisphere points
+        mlt  = np.tile(mlt, 2)               # add southern hemisphere points
 
 
         return mlat[:, np.newaxis], mlt[:, np.newaxis] # reshape to column vectors and return
@@ -317,11 +600,11 @@ class AMPS(object):
         """
 
         mlat, mlt = map(np.ravel, np.meshgrid(np.linspace(self.minlat , self.maxlat, resolution), np.linspace(-179.9, 179.9, resolution)))
-        mlat = np.hstack((mlat, -mlat)) # add southern hemisphere points
-        mlt  = np.hstack((mlt ,   mlt)) * 12/180 # add points for southern hemisphere and scale to mlt
+        mlat = np.concatenate((mlat, -mlat))    # add southern hemisphere points
+        mlt  = np.tile(mlt * 12/180 + 12, 2)    # scale to mlt and add points for southern hemisphere
         self.scalar_resolution = resolution
 
-        return mlat[:, np.newaxis], mlt[:, np.newaxis] + 12 # reshape to column vectors and return
+        return mlat[:, np.newaxis], mlt[:, np.newaxis] # reshape to column vectors and return
 
 
     def calculate_matrices(self):
@@ -331,33 +614,219 @@ class AMPS(object):
         Call this function if and only if the grid has been changed manually
         """
 
-        mlt2r = np.pi/12
+        self._custom_cache = {} # see _custom_matrices
+        self._AE_cache = None   # see get_AE_indices
+
+        # radial factors of the poloidal field at the current height (shape 1, NED):
+        rr = REFRE / (REFRE + self.height)
+        self._rtor_n1 = rr ** (self.n_P + 1.)                                        # poloidal scalar
+        self._rtor_eq = self._rtor_n1 * (2.*self.n_P + 1.)/self.n_P                  # divergence-free current function
+        self._rtor_df = rr ** (self.n_P + 2.) * (2.*self.n_P + 1.)/self.n_P /MU0 * 1e-6  # divergence-free current
+        self._radial_factor   = rr ** (2.*self.n_P + 1.) * (self.n_P + 1.)/self.n_P     # ground magnetic field
+        self._radial_factor_m = self._radial_factor * self.m_P
+        self._radial_factor_n = self._radial_factor * self.n_P
+        self._tor_ju = -1e-6/(MU0 * (REFRE + self.height)) * self.n_T * (self.n_T + 1.)  # upward current
 
         # cos(m * phi) and sin(m * phi):
-        self.pol_cosmphi_vector = np.cos(self.m_P * self.vectorgrid[1] * mlt2r)
-        self.pol_cosmphi_scalar = np.cos(self.m_P * self.scalargrid[1] * mlt2r)
-        self.pol_sinmphi_vector = np.sin(self.m_P * self.vectorgrid[1] * mlt2r)
-        self.pol_sinmphi_scalar = np.sin(self.m_P * self.scalargrid[1] * mlt2r)
-        self.tor_cosmphi_vector = np.cos(self.m_T * self.vectorgrid[1] * mlt2r)
-        self.tor_cosmphi_scalar = np.cos(self.m_T * self.scalargrid[1] * mlt2r)
-        self.tor_sinmphi_vector = np.sin(self.m_T * self.vectorgrid[1] * mlt2r)
-        self.tor_sinmphi_scalar = np.sin(self.m_T * self.scalargrid[1] * mlt2r)
-
-        self.coslambda_vector = np.cos(self.vectorgrid[0] * np.pi/180)
-        self.coslambda_scalar = np.cos(self.scalargrid[0] * np.pi/180)
-
-        # P and dP ( shape  NEQ, NED):
-        vector_P, vector_dP = legendre(self.N, self.M, 90 - self.vectorgrid[0])
-        scalar_P, scalar_dP = legendre(self.N, self.M, 90 - self.scalargrid[0])
-
-        self.pol_P_vector  =  np.array([vector_P[ key] for key in self.keys_P ]).squeeze().T
-        self.pol_dP_vector = -np.array([vector_dP[key] for key in self.keys_P ]).squeeze().T # change sign since we use lat - not colat
-        self.pol_P_scalar  =  np.array([scalar_P[ key] for key in self.keys_P ]).squeeze().T
-        self.pol_dP_scalar = -np.array([scalar_dP[key] for key in self.keys_P ]).squeeze().T
-        self.tor_P_vector  =  np.array([vector_P[ key] for key in self.keys_T ]).squeeze().T
-        self.tor_dP_vector = -np.array([vector_dP[key] for key in self.keys_T ]).squeeze().T
-        self.tor_P_scalar  =  np.array([scalar_P[ key] for key in self.keys_T ]).squeeze().T
-        self.tor_dP_scalar = -np.array([scalar_dP[key] for key in self.keys_T ]).squeeze().T
+        self.pol_cosmphi_vector, self.pol_sinmphi_vector = _cos_sin_mphi(self.m_P, self.vectorgrid[1])
+        self.pol_cosmphi_scalar, self.pol_sinmphi_scalar = _cos_sin_mphi(self.m_P, self.scalargrid[1])
+        self.tor_cosmphi_vector, self.tor_sinmphi_vector = _cos_sin_mphi(self.m_T, self.vectorgrid[1])
+        self.tor_cosmphi_scalar, self.tor_sinmphi_scalar = _cos_sin_mphi(self.m_T, self.scalargrid[1])
+
+        self.coslambda_vector = np.cos(self.vectorgrid[0] * d2r)
+        self.coslambda_scalar = np.cos(self.scalargrid[0] * d2r)
+        self._seclambda_vector = _secant(self.vectorgrid[0])
+        self._seclambda_scalar = _secant(self.scalargrid[0])
+
+        # surface area element in each cell of scalargrid, made when it is needed (see get_integrated_upward_current):
+        self._dS_scalar = None
+
+        # P and dP ( shape  NEQ, NED), with only the northern half calculated if the grid is symmetric:
+        symmetric = _is_hemisphere_symmetric(self.vectorgrid[0])
+        self.pol_P_vector, self.pol_dP_vector, self.tor_P_vector, self.tor_dP_vector = self._legendre(self.vectorgrid[0], self.keys_P, self.keys_T, symmetric = symmetric)
+        symmetric = _is_hemisphere_symmetric(self.scalargrid[0])
+        self.pol_P_scalar, self.pol_dP_scalar, self.tor_P_scalar, self.tor_dP_scalar = self._legendre(self.scalargrid[0], self.keys_P, self.keys_T, symmetric = symmetric)
+
+        # convert to the precision chosen on initialization:
+        for name in ['_rtor_n1', '_rtor_eq', '_rtor_df', '_radial_factor', '_radial_factor_m', '_radial_factor_n', '_tor_ju',
+                     'coslambda_vector', 'coslambda_scalar', '_seclambda_vector', '_seclambda_scalar',
+                     'pol_cosmphi_vector', 'pol_sinmphi_vector', 'pol_cosmphi_scalar', 'pol_sinmphi_scalar',
+                     'tor_cosmphi_vector', 'tor_sinmphi_vector', 'tor_cosmphi_scalar', 'tor_sinmphi_scalar',
+                     'pol_P_vector', 'pol_dP_vector', 'tor_P_vector', 'tor_dP_vector', 
+                     'pol_P_scalar', 'pol_dP_scalar', 'tor_P_scalar', 'tor_dP_scalar']:
+            setattr(self, name, getattr(self, name).astype(self._dtype, copy = False))
+
+        # design matrices for the scalar fields, [P cos(m phi), P sin(m phi)] (shape NEQ, 2 * NED). If scalargrid
+        # is symmetric about the equator, only the northern half is stored, and the southern half is evaluated
+        # with coefficients multiplied by (-1)^(n + m) (see _scalargrid_dot):
+        if _is_hemisphere_symmetric(*self.scalargrid):
+            rows = slice(0, self.scalargrid[0].size // 2)
+            self._tor_sign_scalar = _cs_scale((-1.) ** (self.n_T + self.m_T)).astype(self._dtype)
+            self._pol_sign_scalar = _cs_scale((-1.) ** (self.n_P + self.m_P)).astype(self._dtype)
+        else:
+            rows = slice(None)
+            self._tor_sign_scalar = self._pol_sign_scalar = None
+
+        self.tor_A_scalar = _design_matrix(self.tor_P_scalar[rows], self.tor_cosmphi_scalar[rows], self.tor_sinmphi_scalar[rows])
+        self.pol_A_scalar = _design_matrix(self.pol_P_scalar[rows], self.pol_cosmphi_scalar[rows], self.pol_sinmphi_scalar[rows])
+
+        # design matrices for the total horizontal current on vectorgrid, with the toroidal (curl-free) terms first and
+        # the poloidal (divergence-free) terms last, so that each component is one matrix product (see get_total_current):
+        self._A_east_vector  = np.hstack((_design_matrix(self.tor_P_vector * self._seclambda_vector, self.tor_cosmphi_vector, self.tor_sinmphi_vector),
+                                          _design_matrix(self.pol_dP_vector, self.pol_cosmphi_vector, self.pol_sinmphi_vector)))
+        self._A_north_vector = np.hstack((_design_matrix(self.tor_dP_vector, self.tor_cosmphi_vector, self.tor_sinmphi_vector),
+                                          _design_matrix(self.pol_P_vector * self._seclambda_vector, self.pol_cosmphi_vector, self.pol_sinmphi_vector)))
+
+        # packed matrices for the divergence-free and curl-free currents on vectorgrid, which give the 
+        # eastward and northward components with one matrix product (see _packed_current_matrix):
+        self._A_df_vector = _packed_current_matrix(self.pol_P_vector, self.pol_dP_vector, self.m_P, self._seclambda_vector, 
+                                                   self.pol_cosmphi_vector, self.pol_sinmphi_vector, dtype = self._dtype)
+        self._A_cf_vector = _packed_current_matrix(self.tor_P_vector, self.tor_dP_vector, self.m_T, self._seclambda_vector, 
+                                                   self.tor_cosmphi_vector, self.tor_sinmphi_vector, dtype = self._dtype)
+
+        # BLAS matrix product for the design matrices - called directly to skip numpy's dispatch and layout handling:
+        self._gemm = get_blas_funcs('gemm', (self.tor_A_scalar, ))
+
+        if self._backend == 'cupy': # move the design matrices to the GPU, where _scalargrid_dot uses them
+            self.tor_A_scalar, self.pol_A_scalar = cupy.asarray(self.tor_A_scalar), cupy.asarray(self.pol_A_scalar)
+
+
+    def _scalargrid_dot(self, kind, c):
+        """ 
+        Return the product of the 'tor' or 'pol' design matrix and the (2 * NED, T) coefficients c, 
+        evaluated on all of scalargrid. If only the northern half of the design matrix is stored, 
+        both hemispheres are found with one matrix product, with c and the sign flipped c side by side
+        """
+
+        A, sign = (self.tor_A_scalar, self._tor_sign_scalar) if kind == 'tor' else (self.pol_A_scalar, self._pol_sign_scalar)
+        c = c.astype(A.dtype, copy = False) # avoid upcasting A if the precision is float32
+
+        if self._backend == 'cupy':
+            c = cupy.asarray(c)
+            if sign is not None:
+                north, south = cupy.hsplit(cupy.dot(A, cupy.hstack((c, cupy.asarray(sign) * c))), 2)
+                return cupy.asnumpy(cupy.vstack((north, south)))
+            return cupy.asnumpy(cupy.dot(A, c))
+
+        if sign is None:
+            return self._gemm(1., A, c)
+
+        # interleave the columns of c and sign * c, so that the Fortran ordered (NEQ/2, 2T) product is 
+        # a view of the (NEQ, T) result, with the northern and southern hemisphere stacked:
+        b = np.empty((c.shape[0], 2 * c.shape[1]), dtype = A.dtype, order = 'F')
+        b[:, 0::2] = c
+        np.multiply(sign, c, out = b[:, 1::2])
+
+        return self._gemm(1., A, b).reshape((-1, c.shape[1]), order = 'F')
+
+
+    def _legendre(self, mlat, *keys, **kwargs):
+        """ 
+        Calculate Legendre functions P and their derivatives with respect to latitude, dP, 
+        at mlat. The functions are evaluated once, and returned as (len(mlat), len(keys)) 
+        arrays with columns in the order of each set of keys, as P, dP for the first set of
+        keys, then P, dP for the second set, and so on.
+
+        If the keyword symmetric is True, mlat must be (mlat_north, -mlat_north), and only the 
+        northern half is calculated. This is used for the grids in calculate_matrices. Custom 
+        coordinates always get the full recursion, so that the value at a point does not depend 
+        on the other points in the input
+        """
+
+        symmetric = kwargs.pop('symmetric', False)
+        sizes = [len(k) for k in keys]
+        n, m = np.vstack([np.asarray(k, dtype = np.int16).reshape((-1, 2)) for k in keys]).T
+
+        # the southern half follows from P_n^m(-x) = (-1)^(n + m) P_n^m(x):
+        mlat = np.ravel(mlat)
+        half = mlat.size // 2
+
+        # the dense (npts, N + 1, M + 1) arrays, with the columns for the keys gathered from the flattened (n, m) axes:
+        P, dP = _legendre_array(self.N, self.M, 90 - (mlat[:half] if symmetric else mlat))
+        # the keys index the flattened (n, m) axes, so they must be within the arrays:
+        if np.any((n < 0) | (n > self.N) | (m < 0) | (m > self.M)):
+            raise KeyError('keys must have 0 <= n <= {} and 0 <= m <= {}'.format(self.N, self.M))
+
+        index = n * (self.M + 1) + m
+        P, dP = [np.take(x.reshape((x.shape[0], -1)), index, axis = 1) for x in (P, dP)]
+        np.negative(dP, out = dP) # change sign since we use lat - not colat
+
+        if symmetric:
+            sign = (-1.) ** (n + m)
+            P, dP = np.vstack((P, P * sign)), np.vstack((dP, -dP * sign)) # dP/dlat gets the opposite sign
+
+        splits = np.cumsum(sizes)[:-1]
+        return tuple(x for PdP_k in zip(np.hsplit(P, splits), np.hsplit(dP, splits)) for x in PdP_k)
+
+
+    def _custom_matrices(self, kind, mlat, mlt):
+        """ 
+        Return P, dP, cos(m phi) and sin(m phi) for the 'pol' or 'tor' keys, at custom mlat 
+        and mlt. The arrays are cached, keyed on the coordinate values, so that repeated calls 
+        with the same coordinates skip the Legendre recursion. Only small inputs are cached, 
+        to bound the memory use (see _CACHE_MAX_POINTS and _CACHE_MAX_ENTRIES)
+        """
+
+        keys, m = (self.keys_P, self.m_P) if kind == 'pol' else (self.keys_T, self.m_T)
+
+        mlat, mlt = np.asarray(mlat), np.asarray(mlt)
+        cacheable = max(mlat.size, mlt.size) <= _CACHE_MAX_POINTS
+        if cacheable:
+            key = (kind, mlat.shape, mlt.shape, mlat.dtype.str, mlt.dtype.str, mlat.tobytes(), mlt.tobytes())
+            if key in self._custom_cache:
+                return self._custom_cache[key]
+
+        P, dP = self._legendre(mlat, keys)
+        cosmphi, sinmphi = _cos_sin_mphi(m, mlt)
+
+        if cacheable:
+            if len(self._custom_cache) >= _CACHE_MAX_ENTRIES: # drop the oldest entry
+                self._custom_cache.pop(next(iter(self._custom_cache)))
+            self._custom_cache[key] = P, dP, cosmphi, sinmphi
+
+        return P, dP, cosmphi, sinmphi
+
+
+    def _device_matrices(self, kind, mlat, mlt, xp):
+        """ 
+        Return the same arrays as _custom_matrices, made with the array module xp. With cupy,
+        only mlat and mlt are copied to the GPU, and the Legendre recursion and the cos(m phi)
+        and sin(m phi) terms are evaluated there. The arrays are not cached
+        """
+
+        n, m = (self.n_P, self.m_P) if kind == 'pol' else (self.n_T, self.m_T)
+
+        P, dP = _legendre_array(self.N, self.M, 90 - xp.asarray(mlat, dtype = xp.float64).ravel(), xp = xp)
+        index = xp.asarray(np.ravel(n * (self.M + 1) + m).astype(np.intp))
+        P, dP = [x.reshape((x.shape[0], -1))[:, index] for x in (P, dP)]
+        cosmphi, sinmphi = _cos_sin_mphi(m, xp.asarray(mlt), xp = xp)
+
+        return P, -dP, cosmphi, sinmphi # change sign of dP since we use lat - not colat
+
+
+    def _sum_at_points(self, mlat, mlt, kind, c_P, s_P, c_dP, s_dP):
+        """ return sum_k P_k (c_P[k] cos(m_k phi) + s_P[k] sin(m_k phi)) and the same sum 
+            with dP_k, where dP is the latitude derivative as returned by _legendre. mlat 
+            and mlt are (N, 1) arrays, and the coefficients are (K, 1) arrays that 
+            correspond to the 'pol' or 'tor' keys. Both sums are (N, 1)
+        """
+
+        n, m = (self.n_P, self.m_P) if kind == 'pol' else (self.n_T, self.m_T)
+        n, m = n.ravel(), m.ravel()
+
+        # small inputs are evaluated with the cached matrices, large inputs with the numba kernel if available:
+        if _evaluate_field is None or mlat.size <= _CACHE_MAX_POINTS:
+            P, dP, cosmphi, sinmphi = self._custom_matrices(kind, mlat, mlt)
+            return _sh_sum(P, cosmphi, sinmphi, c_P, s_P), _sh_sum(dP, cosmphi, sinmphi, c_dP, s_dP)
+
+        # the sign of the latitude derivative is folded into the dP coefficients:
+        a, b, d, _ = _legendre_coefficients(self.N, self.M)
+        sum_P, sum_dP = _evaluate_field(np.asarray(mlat, dtype = np.float64).ravel(), 
+                                        np.asarray(mlt , dtype = np.float64).ravel(), 
+                                        np.ascontiguousarray(c_P) ,  np.ascontiguousarray(s_P), 
+                                        np.ascontiguousarray(-c_dP), np.ascontiguousarray(-s_dP),
+                                        n, m, a, b, d)
+        return sum_P, sum_dP
 
 
     def get_toroidal_scalar(self, mlat = DEFAULT, mlt = DEFAULT, grid = False):
@@ -386,41 +855,27 @@ class AMPS(object):
         """
 
         if mlat is DEFAULT or mlt is DEFAULT:
-            T = (  np.dot(self.tor_P_scalar * self.tor_cosmphi_scalar, self.tor_c)
-                 + np.dot(self.tor_P_scalar * self.tor_sinmphi_scalar, self.tor_s) ) 
+            T = self._scalargrid_dot('tor', self.tor_cs)
 
         else: # calculate at custom coordinates
             if grid:
                 assert len(mlat.shape) == len(mlt.shape) == 1 # enforce 1D input arrays
 
-                P, dP = legendre(self.N, self.M, 90 - mlat)
-                P  =  np.transpose(np.array([ P[ key] for key in self.keys_T]), (1,2,0)) # (nlat, 1, 257)
-                mlt = mlt.reshape(1,-1,1)
-                m_T = self.m_T[np.newaxis, ...] # (1, 1, 257)
-
-                cosmphi = np.cos(m_T *  mlt * np.pi/12 ) # (1, nmlt, 257)
-                sinmphi = np.sin(m_T *  mlt * np.pi/12 ) # (1, nmlt, 257)
+                P, dP, cosmphi, sinmphi = self._custom_matrices('tor', mlat, mlt[:, np.newaxis])  # (nlat, NED), (nmlt, NED)
 
-                T = np.dot(P * cosmphi, self.tor_c) + \
-                    np.dot(P * sinmphi, self.tor_s)
-
-                T = T.squeeze()
+                T = _sh_sum(P, cosmphi, sinmphi, self.tor_c, self.tor_s, grid = True)
+                T = _reshape_batch(T, T.shape[:2]) # (nlat, nmlt)
 
             else:
                 shape = mlat.shape
 
-                mlat = mlat.flatten()[:, np.newaxis]
-                mlt  = mlt.flatten()[:, np.newaxis]
-
-                P, dP = legendre(self.N, self.M, 90 - mlat)
-                P  =  np.array([ P[ key] for key in self.keys_T]).T.squeeze()
-                cosmphi   = np.cos(self.m_T *  mlt * np.pi/12 )
-                sinmphi   = np.sin(self.m_T *  mlt * np.pi/12 )
+                mlat = np.ascontiguousarray(mlat).reshape((-1, 1))
+                mlt  = np.ascontiguousarray(mlt ).reshape((-1, 1))
 
-                T = np.dot(P * cosmphi, self.tor_c) + \
-                    np.dot(P * sinmphi, self.tor_s) 
+                P, dP, cosmphi, sinmphi = self._custom_matrices('tor', mlat, mlt)
 
-                T = T.reshape(shape)
+                T = _sh_sum(P, cosmphi, sinmphi, self.tor_c, self.tor_s)
+                T = _reshape_batch(T, shape)
 
 
         return T
@@ -451,42 +906,29 @@ class AMPS(object):
             Poloidal scalar evalulated at self.scalargrid, or, if specified, mlat/mlt
         """
 
-        rtor = (REFRE / (REFRE + self.height)) ** (self.n_P + 1)
+        rtor = self._rtor_n1
 
         if mlat is DEFAULT or mlt is DEFAULT:
-            V = REFRE * (  np.dot(rtor * self.pol_P_scalar * self.pol_cosmphi_scalar, self.pol_c ) 
-                         + np.dot(rtor * self.pol_P_scalar * self.pol_sinmphi_scalar, self.pol_s ) )
+            V = REFRE * self._scalargrid_dot('pol', _cs_scale(rtor) * self.pol_cs)
         else: # calculate at custom coordinates
             if grid:
                 assert len(mlat.shape) == len(mlt.shape) == 1 # enforce 1D input arrays
 
-                P, dP = legendre(self.N, self.M, 90 - mlat)
-                P  =  np.transpose(np.array([ P[ key] for key in self.keys_P]), (1,2,0)) # (nlat, 1, 177)
-                mlt = mlt.reshape(1,-1,1)
-                m_P, n_P = self.m_P[np.newaxis, ...], self.n_P[np.newaxis, ...] # (1, 1, 177)
-
-                cosmphi = np.cos(m_P *  mlt * np.pi/12 ) # (1, nmlt, 177)
-                sinmphi = np.sin(m_P *  mlt * np.pi/12 ) # (1, nmlt, 177)
+                P, dP, cosmphi, sinmphi = self._custom_matrices('pol', mlat, mlt[:, np.newaxis])  # (nlat, NED), (nmlt, NED)
 
-                rtor = (REFRE / (REFRE + self.height)) ** (n_P + 1)
-
-                V = REFRE * (  np.dot(rtor * P * cosmphi, self.pol_c ) 
-                             + np.dot(rtor * P * sinmphi, self.pol_s ) )
-                V = V.squeeze()
+                V = REFRE * _sh_sum(P, cosmphi, sinmphi, rtor.T * self.pol_c, rtor.T * self.pol_s, grid = True)
+                V = _reshape_batch(V, V.shape[:2]) # (nlat, nmlt)
 
             else:
                 shape = mlat.shape
 
-                mlat = mlat.flatten()[:, np.newaxis]
-                mlt  = mlt.flatten()[:, np.newaxis]
+                mlat = np.ascontiguousarray(mlat).reshape((-1, 1))
+                mlt  = np.ascontiguousarray(mlt ).reshape((-1, 1))
+
+                P, dP, cosmphi, sinmphi = self._custom_matrices('pol', mlat, mlt)
 
-                P, dP = legendre(self.N, self.M, 90 - mlat)
-                P  =  np.array([ P[ key] for key in self.keys_P]).T.squeeze()
-                cosmphi   = np.cos(self.m_P *  mlt * np.pi/12 )
-                sinmphi   = np.sin(self.m_P *  mlt * np.pi/12 )
-                V = REFRE * (  np.dot(rtor * P * cosmphi, self.pol_c ) 
-                             + np.dot(rtor * P * sinmphi, self.pol_s ) )
-                V = V.reshape(shape)
+                V = REFRE * _sh_sum(P, cosmphi, sinmphi, rtor.T * self.pol_c, rtor.T * self.pol_s)
+                V = _reshape_batch(V, shape)
 
 
         return V
@@ -538,44 +980,31 @@ class AMPS(object):
            https://doi.org/10.1186/s40623-016-0518-x
         """
 
-        rtor = (REFRE / (REFRE + self.height)) ** (self.n_P + 1.) * (2.*self.n_P + 1.)/self.n_P
+        rtor = self._rtor_eq
 
         if mlat is DEFAULT or mlt is DEFAULT:
-            Psi = - REFRE / MU0 * (  np.dot(rtor * self.pol_P_scalar * self.pol_cosmphi_scalar, self.pol_c ) 
-                                   + np.dot(rtor * self.pol_P_scalar * self.pol_sinmphi_scalar, self.pol_s ) ) * 1e-9  # kA
+            Psi = - REFRE / MU0 * self._scalargrid_dot('pol', _cs_scale(rtor) * self.pol_cs) * 1e-9  # kA
         else: # calculate at custom coordinates
             if grid:
                 assert len(mlat.shape) == len(mlt.shape) == 1 # enforce 1D input arrays
 
-                P, dP = legendre(self.N, self.M, 90 - mlat)
-                P  =  np.transpose(np.array([ P[ key] for key in self.keys_P]), (1,2,0)) # (nlat, 1, 177)
-                mlt = mlt.reshape(1,-1,1)
-                m_P, n_P = self.m_P[np.newaxis, ...], self.n_P[np.newaxis, ...] # (1, 1, 177)
+                P, dP, cosmphi, sinmphi = self._custom_matrices('pol', mlat, mlt[:, np.newaxis])  # (nlat, NED), (nmlt, NED)
 
-                rtor = (REFRE / (REFRE + self.height)) ** (n_P + 1.) * (2.*n_P + 1.)/n_P
- 
-                cosmphi = np.cos(m_P *  mlt * np.pi/12 ) # (1, nmlt, 177)
-                sinmphi = np.sin(m_P *  mlt * np.pi/12 ) # (1, nmlt, 177)
+                Psi = - REFRE / MU0 * _sh_sum(P, cosmphi, sinmphi, rtor.T * self.pol_c, rtor.T * self.pol_s, grid = True) * 1e-9  # kA
+                Psi = _reshape_batch(Psi, Psi.shape[:2]) # (nlat, nmlt)
 
-                Psi = - REFRE / MU0 * (  np.dot(rtor * P * cosmphi, self.pol_c ) 
-                                       + np.dot(rtor * P * sinmphi, self.pol_s ) ) * 1e-9  # kA
-                Psi = Psi.squeeze()
- 
             else:
                 shape = mlat.shape
-                mlat = mlat.flatten()[:, np.newaxis]
-                mlt  = mlt.flatten()[:, np.newaxis]
 
-                P, dP = legendre(self.N, self.M, 90 - mlat)
-                P  =  np.array([ P[ key] for key in self.keys_P]).T.squeeze()
-                cosmphi   = np.cos(self.m_P *  mlt * np.pi/12 )
-                sinmphi   = np.sin(self.m_P *  mlt * np.pi/12 )
-                Psi = - REFRE / MU0 * (  np.dot(rtor * P * cosmphi, self.pol_c ) 
-                                       + np.dot(rtor * P * sinmphi, self.pol_s ) ) * 1e-9  # kA
-                Psi = Psi.reshape(shape)
+                mlat = np.ascontiguousarray(mlat).reshape((-1, 1))
+                mlt  = np.ascontiguousarray(mlt ).reshape((-1, 1))
+
+                P, dP, cosmphi, sinmphi = self._custom_matrices('pol', mlat, mlt)
+
+                Psi = - REFRE / MU0 * _sh_sum(P, cosmphi, sinmphi, rtor.T * self.pol_c, rtor.T * self.pol_s) * 1e-9  # kA
+                Psi = _reshape_batch(Psi, shape)
 
 
-        
         return Psi
 
 
@@ -604,38 +1033,31 @@ class AMPS(object):
             Upward current evaulated at self.scalargrid, or, if specified, mlat/mlt
         """
 
+        ju = self._tor_ju.T
+
         if mlat is DEFAULT or mlt is DEFAULT:
-            Ju = -1e-6/(MU0 * (REFRE + self.height) ) * (   np.dot(self.n_T * (self.n_T + 1) * self.tor_P_scalar * self.tor_cosmphi_scalar, self.tor_c) 
-                                                          + np.dot(self.n_T * (self.n_T + 1) * self.tor_P_scalar * self.tor_sinmphi_scalar, self.tor_s) )
+            Ju = self._scalargrid_dot('tor', _cs_scale(self._tor_ju) * self.tor_cs)
 
         else: # calculate at custom coordinates
             if grid:
                 assert len(mlat.shape) == len(mlt.shape) == 1 # enforce 1D input arrays
 
-                P, dP = legendre(self.N, self.M, 90 - mlat)
-                P  =  np.transpose(np.array([ P[ key] for key in self.keys_T]), (1,2,0)) # (nlat, 1, 257)
-                mlt = mlt.reshape(1,-1,1)
-                n_T, m_T = self.n_T[np.newaxis, ...], self.m_T[np.newaxis, ...] # (1, 1, 257)
-                
-                cosmphi = np.cos(m_T *  mlt * np.pi/12 ) # (1, nmlt, 257)
-                sinmphi = np.sin(m_T *  mlt * np.pi/12 ) # (1, nmlt, 257)
-                Ju = -1e-6/(MU0 * (REFRE + self.height) ) * ( np.dot(n_T * (n_T + 1) * P * cosmphi, self.tor_c) 
-                                                          +   np.dot(n_T * (n_T + 1) * P * sinmphi, self.tor_s) )
-
-                Ju = Ju.squeeze() # (nmlat, nmlt), transpose of original  
-    
-            else:    
+                P, dP, cosmphi, sinmphi = self._custom_matrices('tor', mlat, mlt[:, np.newaxis])  # (nlat, NED), (nmlt, NED)
+
+                Ju = _sh_sum(P, cosmphi, sinmphi, ju * self.tor_c, ju * self.tor_s, grid = True)
+                Ju = _reshape_batch(Ju, Ju.shape[:2]) # (nlat, nmlt)
+
+            else:
                 shape = mlat.shape
-                mlat = mlat.flatten()[:, np.newaxis]
-                mlt  = mlt.flatten()[:, np.newaxis]
 
-                P, dP = legendre(self.N, self.M, 90 - mlat)
-                P  =  np.array([ P[ key] for key in self.keys_T]).T.squeeze()
-                cosmphi   = np.cos(self.m_T *  mlt * np.pi/12 )
-                sinmphi   = np.sin(self.m_T *  mlt * np.pi/12 )
-                Ju = -1e-6/(MU0 * (REFRE + self.height) ) * ( np.dot(self.n_T * (self.n_T + 1) * P * cosmphi, self.tor_c) 
-                                                          +   np.dot(self.n_T * (self.n_T + 1) * P * sinmphi, self.tor_s) )
-                Ju = Ju.reshape(shape)
+                mlat = np.ascontiguousarray(mlat).reshape((-1, 1))
+                mlt  = np.ascontiguousarray(mlt ).reshape((-1, 1))
+
+                P, dP, cosmphi, sinmphi = self._custom_matrices('tor', mlat, mlt)
+
+                Ju = _sh_sum(P, cosmphi, sinmphi, ju * self.tor_c, ju * self.tor_s)
+                Ju = _reshape_batch(Ju, shape)
+
 
         return Ju
 
@@ -669,45 +1091,67 @@ class AMPS(object):
         """
 
         if mlat is DEFAULT or mlt is DEFAULT:
-            alpha = -(REFRE + self.height) / MU0 * (   np.dot(self.tor_P_scalar * self.tor_cosmphi_scalar, self.tor_c) 
-                                                     + np.dot(self.tor_P_scalar * self.tor_sinmphi_scalar, self.tor_s) ) * 1e-9
+            alpha = -(REFRE + self.height) / MU0 * self._scalargrid_dot('tor', self.tor_cs) * 1e-9
 
         else: # calculate at custom coordinates
             if grid:
                 assert len(mlat.shape) == len(mlt.shape) == 1 # enforce 1D input arrays
 
-                P, dP = legendre(self.N, self.M, 90 - mlat)
-                P  =  np.transpose(np.array([ P[ key] for key in self.keys_T]), (1,2,0)) # (nlat, 1, 257)
-                mlt = mlt.reshape(1,-1,1)
-                n_T, m_T = self.n_T[np.newaxis, ...], self.m_T[np.newaxis, ...] # (1, 1, 257)
-
-                
-                cosmphi = np.cos(m_T *  mlt * np.pi/12 ) # (1, nmlt, 257)
-                sinmphi = np.sin(m_T *  mlt * np.pi/12 ) # (1, nmlt, 257)
+                P, dP, cosmphi, sinmphi = self._custom_matrices('tor', mlat, mlt[:, np.newaxis])  # (nlat, NED), (nmlt, NED)
 
-                alpha = -(REFRE + self.height) / MU0 * (   np.dot(P * cosmphi, self.tor_c) 
-                                                         + np.dot(P * sinmphi, self.tor_s) ) * 1e-9
-                alpha = alpha.squeeze()
-                
+                alpha = -(REFRE + self.height) / MU0 * _sh_sum(P, cosmphi, sinmphi, self.tor_c, self.tor_s, grid = True) * 1e-9
+                alpha = _reshape_batch(alpha, alpha.shape[:2]) # (nlat, nmlt)
 
             else:
                 shape = mlat.shape
-                mlat = mlat.flatten()[:, np.newaxis]
-                mlt  = mlt.flatten()[:, np.newaxis]
 
-                P, dP = legendre(self.N, self.M, 90 - mlat)
-                P  =  np.array([ P[ key] for key in self.keys_T]).T.squeeze()
-                cosmphi   = np.cos(self.m_T *  mlt * np.pi/12 )
-                sinmphi   = np.sin(self.m_T *  mlt * np.pi/12 )
+                mlat = np.ascontiguousarray(mlat).reshape((-1, 1))
+                mlt  = np.ascontiguousarray(mlt ).reshape((-1, 1))
+
+                P, dP, cosmphi, sinmphi = self._custom_matrices('tor', mlat, mlt)
 
-                alpha = -(REFRE + self.height) / MU0 * (   np.dot(P * cosmphi, self.tor_c) 
-                                                         + np.dot(P * sinmphi, self.tor_s) ) * 1e-9
-                alpha = alpha.reshape(shape)
+                alpha = -(REFRE + self.height) / MU0 * _sh_sum(P, cosmphi, sinmphi, self.tor_c, self.tor_s) * 1e-9
+                alpha = _reshape_batch(alpha, shape)
 
 
         return alpha
 
 
+    def get_all_scalars(self):
+        """ 
+        Calculate all the scalar fields on `scalargrid` at once. This is faster than calling 
+        the individual functions when several scalar fields are needed, since the fields that 
+        share a design matrix are calculated with a single matrix-matrix product.
+
+        Returns
+        -------
+        T : numpy.ndarray
+            Toroidal scalar (nT), see get_toroidal_scalar
+        V : numpy.ndarray
+            Poloidal scalar (microTm), see get_poloidal_scalar
+        Psi : numpy.ndarray
+            Divergence-free current function (kA), see get_divergence_free_current_function
+        Ju : numpy.ndarray
+            Upward current (microAmps per square meter), see get_upward_current
+        alpha : numpy.ndarray
+            Curl-free current potential (kA), see get_curl_free_current_potential
+
+        All fields are evaluated at self.scalargrid
+        """
+
+        # one column of scaled coefficients per field:
+        C_tor = np.hstack((                                     self.tor_cs,                                         # T
+                           _cs_scale(self._tor_ju) * self.tor_cs,                                                   # Ju
+                           -(REFRE + self.height) / MU0 * 1e-9 * self.tor_cs))                                        # alpha
+        C_pol = np.hstack((  REFRE              * _cs_scale(self._rtor_n1) * self.pol_cs,                            # V
+                           - REFRE / MU0 * 1e-9 * _cs_scale(self._rtor_eq) * self.pol_cs))                            # Psi
+
+        T, Ju, alpha = np.hsplit(self._scalargrid_dot('tor', C_tor), 3)
+        V, Psi       = np.hsplit(self._scalargrid_dot('pol', C_pol), 2)
+
+        return T, V, Psi, Ju, alpha
+
+
     def get_divergence_free_current(self, mlat = DEFAULT, mlt = DEFAULT, grid = False):
         """ 
         Calculate the divergence-free part of the horizontal current, in units of mA/m.
@@ -742,61 +1186,43 @@ class AMPS(object):
 
         """
         
-        rtor = (REFRE / (REFRE + self.height)) ** (self.n_P + 2.) * (2.*self.n_P + 1.)/self.n_P /MU0 * 1e-6
+        rtor   = self._rtor_df
+        rtor_m = rtor * self.m_P
 
         if mlat is DEFAULT or mlt is DEFAULT:
-            east  =    (  np.dot(rtor * self.pol_dP_vector * self.pol_cosmphi_vector, self.pol_c) 
-                        + np.dot(rtor * self.pol_dP_vector * self.pol_sinmphi_vector, self.pol_s) )
-    
-            north =  - (  np.dot(rtor * self.pol_P_vector * self.m_P * self.pol_cosmphi_vector, self.pol_s)
-                        - np.dot(rtor * self.pol_P_vector * self.m_P * self.pol_sinmphi_vector, self.pol_c) ) / self.coslambda_vector
+            c = (_cs_scale(rtor) * self.pol_cs).astype(self._dtype, copy = False)
+            east, north = np.vsplit(np.dot(self._A_df_vector, c), 2)
 
-            return east.flatten(), north.flatten()
+            return _reshape_batch(east, (-1, )), _reshape_batch(north, (-1, ))
 
 
         else: # calculate at custom mlat, mlt
             if grid:
                 assert len(mlat.shape) == len(mlt.shape) == 1 # enforce 1D input arrays
 
-                P, dP = legendre(self.N, self.M, 90 - mlat)
-                P  =  np.transpose(np.array([ P[ key] for key in self.keys_P]), (1,2,0)) # (nlat, 1, 177)
-                dP = -np.transpose(np.array([dP[ key] for key in self.keys_P]), (1,2,0)) # (nlat, 1, 177)
-                mlt = mlt.reshape(1, -1, 1)
-                mlat = mlat.reshape(-1, 1, 1)
-                m_P, n_P = self.m_P[np.newaxis, ...], self.n_P[np.newaxis, ...] # (1, 1, 177)
-
-                rtor = (REFRE / (REFRE + self.height)) ** (n_P + 2.) * (2.*n_P + 1.)/n_P /MU0 * 1e-6
+                P, dP, cosmphi, sinmphi = self._custom_matrices('pol', mlat, mlt[:, np.newaxis])  # (nlat, NED), (nmlt, NED)
+                seclambda = _secant(mlat.reshape(-1, 1, 1))               # (nlat, 1, 1)
 
-                coslambda = np.cos(      mlat * np.pi/180) # (nmlat, 1   , 177)
-                cosmphi   = np.cos(m_P * mlt  * np.pi/12 ) # (1    , nmlt, 177)
-                sinmphi   = np.sin(m_P * mlt  * np.pi/12 ) # (1    , nmlt, 177)
+                east  =   _sh_sum(dP, cosmphi, sinmphi, rtor.T   * self.pol_c,  rtor.T   * self.pol_s, grid = True)
+                north = - _sh_sum( P, cosmphi, sinmphi, rtor_m.T * self.pol_s, -rtor_m.T * self.pol_c, grid = True) * seclambda
 
-                east  = (  np.dot(rtor * dP       * cosmphi, self.pol_c) \
-                         + np.dot(rtor * dP       * sinmphi, self.pol_s) )
-                north = (- np.dot(rtor *  P * m_P * cosmphi, self.pol_s) \
-                         + np.dot(rtor *  P * m_P * sinmphi, self.pol_c) ) / coslambda
-
-                return east.squeeze(), north.squeeze()
+                return _reshape_batch(east, east.shape[:2]), _reshape_batch(north, north.shape[:2])
 
 
             else:
                 shape = mlat.shape
-                mlat = mlat.flatten()[:, np.newaxis]
-                mlt  = mlt.flatten()[:, np.newaxis]
 
-                P, dP = legendre(self.N, self.M, 90 - mlat)
-                P  =  np.array([ P[ key] for key in self.keys_P]).T.squeeze()
-                dP = -np.array([dP[ key] for key in self.keys_P]).T.squeeze()
-                cosmphi   = np.cos(self.m_P *  mlt * np.pi/12 )
-                sinmphi   = np.sin(self.m_P *  mlt * np.pi/12 )
-                coslambda = np.cos(           mlat * np.pi/180)
+                mlat = np.ascontiguousarray(mlat).reshape((-1, 1))
+                mlt  = np.ascontiguousarray(mlt ).reshape((-1, 1))
+
+                seclambda = _secant(mlat)
 
-                east  = (  np.dot(rtor * dP            * cosmphi, self.pol_c) \
-                         + np.dot(rtor * dP            * sinmphi, self.pol_s) )
-                north = (- np.dot(rtor *  P * self.m_P * cosmphi, self.pol_s) \
-                         + np.dot(rtor *  P * self.m_P * sinmphi, self.pol_c) ) / coslambda
+                sum_P, sum_dP = self._sum_at_points(mlat, mlt, 'pol', rtor_m.T * self.pol_s, -rtor_m.T * self.pol_c,
+                                                                      rtor.T   * self.pol_c,  rtor.T   * self.pol_s)
+                east  =   sum_dP
+                north = - sum_P * seclambda
 
-                return east.reshape(shape), north.reshape(shape)
+                return _reshape_batch(east, shape), _reshape_batch(north, shape)
 
 
 
@@ -837,53 +1263,38 @@ class AMPS(object):
         rtor = -1.e-6/MU0
 
         if mlat is DEFAULT or mlt is DEFAULT:
-            east = rtor * (    np.dot(self.tor_P_vector * self.m_T * self.tor_cosmphi_vector, self.tor_s )
-                             - np.dot(self.tor_P_vector * self.m_T * self.tor_sinmphi_vector, self.tor_c )) / self.coslambda_vector
-    
-            north = rtor * (   np.dot(self.tor_dP_vector * self.tor_cosmphi_vector, self.tor_c)
-                             + np.dot(self.tor_dP_vector * self.tor_sinmphi_vector, self.tor_s))
+            north, east = np.vsplit(np.dot(self._A_cf_vector, rtor * self.tor_cs), 2)
+            east = -east
 
-            return east.flatten(), north.flatten()
+            return _reshape_batch(east, (-1, )), _reshape_batch(north, (-1, ))
 
         else: # calculate at custom mlat, mlt
             if grid:
                 assert len(mlat.shape) == len(mlt.shape) == 1 # enforce 1D input arrays
 
-                P, dP = legendre(self.N, self.M, 90 - mlat)
-                P  =  np.transpose(np.array([ P[ key] for key in self.keys_T]), (1,2,0)) # (nlat, 1, 257)
-                dP = -np.transpose(np.array([dP[ key] for key in self.keys_T]), (1,2,0)) # (nlat, 1, 257)
-                mlt = mlt.reshape(1,-1,1)
-                mlat = mlat.reshape(-1, 1, 1)
-                n_T, m_T = self.n_T[np.newaxis, ...], self.m_T[np.newaxis, ...] # (1, 1, 257)
+                P, dP, cosmphi, sinmphi = self._custom_matrices('tor', mlat, mlt[:, np.newaxis])  # (nlat, NED), (nmlt, NED)
+                seclambda = _secant(mlat.reshape(-1, 1, 1))               # (nlat, 1, 1)
 
-                coslambda = np.cos(      mlat * np.pi/180) # (nmlat, 1   , 177)                
-                cosmphi   = np.cos(m_T *  mlt * np.pi/12 ) # (1, nmlt, 257)
-                sinmphi   = np.sin(m_T *  mlt * np.pi/12 ) # (1, nmlt, 257)
+                east  = rtor * _sh_sum( P, cosmphi, sinmphi, self.m_T.T * self.tor_s, -self.m_T.T * self.tor_c, grid = True) * seclambda
+                north = rtor * _sh_sum(dP, cosmphi, sinmphi, self.tor_c, self.tor_s, grid = True)
 
-                east  = (  np.dot(rtor *  P * m_T * cosmphi, self.tor_s) \
-                         - np.dot(rtor *  P * m_T * sinmphi, self.tor_c) ) / coslambda
-                north = (  np.dot(rtor * dP       * cosmphi, self.tor_c) \
-                         + np.dot(rtor * dP       * sinmphi, self.tor_s) ) 
+                return _reshape_batch(east, east.shape[:2]), _reshape_batch(north, north.shape[:2])
 
-                return east.squeeze(), north.squeeze()
 
             else:
                 shape = mlat.shape
-                mlat = mlat.flatten()[:, np.newaxis]
-                mlt  = mlt.flatten()[ :, np.newaxis]
 
-                P, dP = legendre(self.N, self.M, 90 - mlat)
-                P  =  np.array([ P[ key] for key in self.keys_T]).T.squeeze()
-                dP = -np.array([dP[ key] for key in self.keys_T]).T.squeeze()
-                cosmphi   = np.cos(self.m_T *  mlt * np.pi/12 )
-                sinmphi   = np.sin(self.m_T *  mlt * np.pi/12 )
-                coslambda = np.cos(           mlat * np.pi/180)
+                mlat = np.ascontiguousarray(mlat).reshape((-1, 1))
+                mlt  = np.ascontiguousarray(mlt ).reshape((-1, 1))
 
-                east  = (  np.dot(rtor *  P * self.m_T * cosmphi, self.tor_s) \
-                         - np.dot(rtor *  P * self.m_T * sinmphi, self.tor_c) ) / coslambda
-                north = (  np.dot(rtor * dP            * cosmphi, self.tor_c) \
-                         + np.dot(rtor * dP            * sinmphi, self.tor_s) ) 
-                return east.reshape(shape), north.reshape(shape)
+                seclambda = _secant(mlat)
+
+                sum_P, sum_dP = self._sum_at_points(mlat, mlt, 'tor', self.m_T.T * self.tor_s, -self.m_T.T * self.tor_c,
+                                                                      self.tor_c, self.tor_s)
+                east  = rtor * sum_P * seclambda
+                north = rtor * sum_dP
+
+                return _reshape_batch(east, shape), _reshape_batch(north, shape)
 
 
 
@@ -922,6 +1333,22 @@ class AMPS(object):
         get_curl_free_current : Calculate curl-free part of the horizontal current
         """
         
+        if mlat is DEFAULT or mlt is DEFAULT:
+            # curl-free and divergence-free parts in one matrix product per component:
+            rtor_cf = -1.e-6/MU0
+            rtor_df = self._rtor_df
+            rtor_m  = rtor_df * self.m_P
+
+            c_east  = np.vstack(( rtor_cf * self.m_T.T * self.tor_s, -rtor_cf * self.m_T.T * self.tor_c, 
+                                  rtor_df.T * self.pol_c           ,  rtor_df.T * self.pol_s))
+            c_north = np.vstack(( rtor_cf * self.tor_c             ,  rtor_cf * self.tor_s, 
+                                 -rtor_m.T  * self.pol_s           ,  rtor_m.T  * self.pol_c))
+
+            east  = np.dot(self._A_east_vector , c_east.astype( self._dtype, copy = False))
+            north = np.dot(self._A_north_vector, c_north.astype(self._dtype, copy = False))
+
+            return [_reshape_batch(east, (-1, )), _reshape_batch(north, (-1, ))]
+
         return [x + y for x, y in zip(self.get_curl_free_current(      mlat = mlat, mlt = mlt, grid = grid), 
                                       self.get_divergence_free_current(mlat = mlat, mlt = mlt, grid = grid))]
 
@@ -950,20 +1377,16 @@ class AMPS(object):
         # curl-free part:
         C = -1.e-6/MU0
 
-        je_cf = C * (   np.dot(self.tor_P_scalar * self.m_T * self.tor_cosmphi_scalar, self.tor_s )
-                         - np.dot(self.tor_P_scalar * self.m_T * self.tor_sinmphi_scalar, self.tor_c )) / self.coslambda_scalar
+        je_cf = C * self._scalargrid_dot('tor', _cs_scale(self.m_T) * self._tor_sc) * self._seclambda_scalar
 
-        jn_cf = C * (   np.dot(self.tor_dP_scalar * self.tor_cosmphi_scalar, self.tor_c)
-                         + np.dot(self.tor_dP_scalar * self.tor_sinmphi_scalar, self.tor_s))
+        jn_cf = C * _sh_sum(self.tor_dP_scalar, self.tor_cosmphi_scalar, self.tor_sinmphi_scalar, self.tor_c, self.tor_s)
 
         # divergence-free part:
-        rtor = (REFRE / (REFRE + self.height)) ** (self.n_P + 2.) * (2.*self.n_P + 1.)/self.n_P /MU0 * 1e-6
+        rtor = self._rtor_df
 
-        je_df =    (  np.dot(rtor * self.pol_dP_scalar * self.pol_cosmphi_scalar, self.pol_c) 
-                    + np.dot(rtor * self.pol_dP_scalar * self.pol_sinmphi_scalar, self.pol_s) )
+        je_df = _sh_sum(self.pol_dP_scalar, self.pol_cosmphi_scalar, self.pol_sinmphi_scalar, rtor.T * self.pol_c, rtor.T * self.pol_s)
 
-        jn_df =  - (  np.dot(rtor * self.pol_P_scalar * self.m_P * self.pol_cosmphi_scalar, self.pol_s)
-                    - np.dot(rtor * self.pol_P_scalar * self.m_P * self.pol_sinmphi_scalar, self.pol_c) ) / self.coslambda_scalar
+        jn_df =  - self._scalargrid_dot('pol', _cs_scale(rtor * self.m_P) * self._pol_sc) * self._seclambda_scalar
 
         # return magntitude of vector sum:
         return np.sqrt((je_cf + je_df)**2 + (jn_cf + jn_df)**2)
@@ -993,22 +1416,28 @@ class AMPS(object):
             Total downward current in the southern hemisphere
         """
 
-        ju = self.get_upward_current() * 1e-6 # unit A/m^2
+        # surface area element in each cell of scalargrid (m^2), which is kept until the matrices are recalculated. 
+        # This needs at least two distinct mlat and mlt values, so it is not made in calculate_matrices:
+        if self._dS_scalar is None:
+            mlat, mlt = self.scalargrid
+            mlt_sorted = np.sort(np.unique(mlt))
+            mltres = (mlt_sorted[1] - mlt_sorted[0]) * mlt2r
+            mlat_sorted = np.sort(np.unique(mlat))
+            mlatres = (mlat_sorted[1] - mlat_sorted[0]) * d2r
+            R = (REFRE + self.height) * 1e3  # radius in meters
+            self._dS_scalar = (R**2 * self.coslambda_scalar * mlatres * mltres).astype(self._dtype, copy = False)
 
-        # get surface area element in each cell:
-        mlat, mlt = self.scalargrid
-        mlt_sorted = np.sort(np.unique(mlt))
-        mltres = (mlt_sorted[1] - mlt_sorted[0]) * np.pi / 12
-        mlat_sorted = np.sort(np.unique(mlat))
-        mlatres = (mlat_sorted[1] - mlat_sorted[0]) * np.pi / 180
-        R = (REFRE + self.height) * 1e3  # radius in meters
-        dS = R**2 * np.cos(mlat * np.pi/180) * mlatres * mltres
+        ju = self.get_upward_current() * 1e-6 # unit A/m^2
 
+        J = (self._dS_scalar * ju * 1e-6).reshape((2, -1, ju.shape[-1])) # convert to MA and split to north and south
 
-        J_n, J_s = np.split(dS * ju * 1e-6, 2) # convert to MA and split to north and south
+        # separate upward and downward currents in one pass:
+        J_up   = np.maximum(J, 0)
+        J_down = J - J_up
+        J_up, J_down = _reshape_batch(J_up.sum(axis = 1), (2, )), _reshape_batch(J_down.sum(axis = 1), (2, ))
 
-        #      J_up_north            J_down_north          J_up_south            J_down_south
-        return np.sum(J_n[J_n > 0]), np.sum(J_n[J_n < 0]), np.sum(J_s[J_s > 0]), np.sum(J_s[J_s < 0])
+        #      J_up_north J_down_north J_up_south J_down_south
+        return J_up[0]  , J_down[0]  , J_up[1]  , J_down[1]
 
 
     def get_ground_Beqd(self, height = 0):
@@ -1056,13 +1485,11 @@ class AMPS(object):
         get_ground_perturbation: Calculate ground perturbation in east/north qd direction
         """
 
-        rr   = REFRE / (REFRE + self.height) # ratio of current radius to earth radius
         hh   = REFRE + height
 
-        G_ce    = rr ** (2 * self.n_P + 1) * (hh / REFRE) ** self.n_P * (self.n_P + 1.) / self.n_P * self.pol_P_scalar * self.m_P / self.coslambda_scalar
-        G = np.hstack((-G_ce * self.pol_sinmphi_scalar, G_ce * self.pol_cosmphi_scalar))
+        G_ce    = self._radial_factor_m * (hh / REFRE) ** self.n_P
 
-        return G.dot(np.vstack((self.pol_c, self.pol_s)))
+        return self._scalargrid_dot('pol', _cs_scale(G_ce) * self._pol_sc) * self._seclambda_scalar
 
 
     def get_ground_Bnqd(self, height = 0):
@@ -1110,13 +1537,11 @@ class AMPS(object):
         get_ground_perturbation: Calculate ground perturbation in east/north qd direction
         """
 
-        rr   = REFRE / (REFRE + self.height) # ratio of current radius to earth radius
         hh   = REFRE + height
 
-        G_cn    = rr ** (2 * self.n_P + 1) * (hh / REFRE) ** self.n_P * (self.n_P + 1.) / self.n_P * self.pol_dP_scalar 
-        G = np.hstack(( G_cn * self.pol_cosmphi_scalar, G_cn * self.pol_sinmphi_scalar))
+        G_cn    = (self._radial_factor * (hh / REFRE) ** self.n_P).T
 
-        return G.dot(np.vstack((self.pol_c, self.pol_s)))
+        return _sh_sum(self.pol_dP_scalar, self.pol_cosmphi_scalar, self.pol_sinmphi_scalar, G_cn * self.pol_c, G_cn * self.pol_s)
 
 
     def get_ground_Buqd(self, height = 0.):
@@ -1164,13 +1589,11 @@ class AMPS(object):
         get_ground_perturbation: Calculate ground perturbation in east/north qd direction
         """
 
-        rr   = REFRE / (REFRE + self.height) # ratio of current radius to earth radius
         hh   = REFRE + height
 
-        G_ce = rr ** (2 * self.n_P + 1) * (hh / REFRE) ** (self.n_P - 1) * (self.n_P + 1.) * self.pol_P_scalar 
-        G = np.hstack(( G_ce * self.pol_cosmphi_scalar, G_ce * self.pol_sinmphi_scalar))
+        G_ce = self._radial_factor_n * (hh / REFRE) ** (self.n_P - 1)
 
-        return G.dot(np.vstack((self.pol_c, self.pol_s)))
+        return self._scalargrid_dot('pol', _cs_scale(G_ce) * self.pol_cs)
 
 
     def get_ground_perturbation(self, mlat = DEFAULT, mlt = DEFAULT, height = 0):
@@ -1204,7 +1627,8 @@ class AMPS(object):
         to geographic by use of QD base vectors [3]_
 
         This function is not optimized for calculating long time series of model ground
-        magnetic field perturbations, although it is possible to use for that.
+        magnetic field perturbations, although it is possible to use for that. For a time
+        series of model coefficients, see get_ground_perturbation_batch.
 
 
         Return
@@ -1223,36 +1647,76 @@ class AMPS(object):
 
         """
 
-        # if mlat and mlt are not given, call function again with vectorgrid
+        return self.get_ground_perturbation_batch(self.pol_c.T, self.pol_s.T, mlat, mlt, height = height)
+
+
+    def get_ground_perturbation_batch(self, pol_c, pol_s, mlat = DEFAULT, mlt = DEFAULT, height = 0):
+        """ 
+        Calculate magnetic field perturbations on ground, in units of nT, for a set of T
+        poloidal coefficient vectors, for example one per time step. See get_ground_perturbation 
+        for details. The Legendre functions and trigonometric terms are evaluated once, and 
+        shared by all sets of coefficients.
+
+        Parameters
+        ----------
+        pol_c : numpy.ndarray
+            (T, K) array of poloidal cos coefficients, in the order of self.keys_P
+        pol_s : numpy.ndarray
+            (T, K) array of poloidal sin coefficients, in the order of self.keys_P
+        mlat : numpy.ndarray, float, optional
+            magnetic latitude of the output. The array shape will not be preserved. Default 
+            value is from self.vectorgrid
+        mlt : numpy.ndarray, float, optional
+            magnetic local time of the output. The array shape will not be preserved. Default 
+            value is from self.vectorgrid
+        height: float, optional
+            geodetic height at which the field should be evalulated. Should be < current height
+            set at initialization. Default 0 (ground)
+
+        Return
+        ------
+        dB_east : numpy.ndarray
+            (N, T) array of the eastward component of the magnetic field disturbance on ground
+        dB_north : numpy.ndarray
+            (N, T) array of the northward component of the magnetic field disurubance on ground
+        """
+
+        # if mlat and mlt are not given, use vectorgrid
         if mlat is DEFAULT or mlt is DEFAULT:
-            return self.get_ground_perturbation(self.vectorgrid[0], self.vectorgrid[1], height = height)
+            mlat, mlt = self.vectorgrid
 
-        mlt  = mlt. flatten()[:, np.newaxis]
-        mlat = mlat.flatten()[:, np.newaxis]
-        rr   = REFRE / (REFRE + self.height) # ratio of current radius to earth radius
-        hh   = REFRE + height
+        hh = REFRE + height
+        pol_c, pol_s = np.atleast_2d(pol_c).T, np.atleast_2d(pol_s).T # (K, T)
 
-        m = self.m_P
-        n = self.n_P
+        # scale factors for the north and east components, folded into the coefficients:
+        G_cn   =  (self._radial_factor   * (hh / REFRE) ** self.n_P).T
+        G_ce   =  (self._radial_factor_m * (hh / REFRE) ** self.n_P).T
 
+        # on vectorgrid, the field has the same form as the divergence-free current, and the packed
+        # matrix from calculate_matrices gives both components with one product:
+        if mlat is self.vectorgrid[0] and mlt is self.vectorgrid[1]:
+            c = -np.vstack((G_cn * pol_c, G_cn * pol_s)).astype(self._dtype, copy = False)
+            north, east = np.vsplit(np.dot(self._A_df_vector, c), 2)
+            return east, -north
 
-        P, dP = legendre(self.N, self.M, 90 - mlat)
-        P  = np.array([ P[ key] for key in self.keys_P]).T.squeeze()
-        dP = np.array([dP[ key] for key in self.keys_P]).T.squeeze()
-        cosmphi = np.cos(m * mlt * np.pi/12)
-        sinmphi = np.sin(m * mlt * np.pi/12)
+        # on scalargrid, the design matrix of the poloidal scalar and the stored dP are used:
+        if mlat is self.scalargrid[0] and mlt is self.scalargrid[1]:
+            east  = self._scalargrid_dot('pol', np.vstack((G_ce * pol_s, -G_ce * pol_c))) * self._seclambda_scalar
+            north = _sh_sum(self.pol_dP_scalar, self.pol_cosmphi_scalar, self.pol_sinmphi_scalar, G_cn * pol_c, G_cn * pol_s)
+            return east, north
 
-        # G matrix for north component
-        G_cn   =  - rr ** (2 * n + 1) * (hh / REFRE) ** n * (n + 1.)/n * dP
-        Gn     =  np.hstack(( G_cn * cosmphi, G_cn * sinmphi))
-        
-        # G matrix for east component
-        G_ce   =  rr ** (2 * n + 1) * (hh / REFRE) ** n * (n + 1.)/n * P * m / np.cos(mlat * np.pi / 180)
-        Ge     =  np.hstack((-G_ce * sinmphi, G_ce * cosmphi))
+        mlt  = np.ascontiguousarray(mlt ).reshape((-1, 1))
+        mlat = np.ascontiguousarray(mlat).reshape((-1, 1))
 
-        model = np.vstack((self.pol_c, self.pol_s))
+        if self._backend == 'cupy': # the matrices and sums on the GPU, with only coordinates and coefficients copied:
+            P, dP, cosmphi, sinmphi = self._device_matrices('pol', mlat, mlt, cupy)
+            sum_P  = cupy.asnumpy(_sh_sum(P , cosmphi, sinmphi, *map(cupy.asarray, (G_ce * pol_s, -G_ce * pol_c))))
+            sum_dP = cupy.asnumpy(_sh_sum(dP, cosmphi, sinmphi, *map(cupy.asarray, (G_cn * pol_c,  G_cn * pol_s))))
+        else: # the sums over P and dP, with the numba kernel for large inputs (see _sum_at_points):
+            sum_P, sum_dP = self._sum_at_points(mlat, mlt, 'pol', G_ce * pol_s, -G_ce * pol_c,
+                                                                  G_cn * pol_c,  G_cn * pol_s)
 
-        return Ge.dot(model), Gn.dot(model)
+        return sum_P * _secant(mlat), sum_dP
 
 
     def get_AE_indices(self):
@@ -1282,18 +1746,35 @@ class AMPS(object):
             Model AU index in the southern hemisphere
         """
 
-        rr   = REFRE / (REFRE + self.height) # ratio of current radius to earth radius
-        n = self.n_P
-
-        dP = self.pol_dP_scalar
-
-        G_cn   =  rr ** (2 * n + 1) * (n + 1.)/n * dP
-        Gn     =  np.hstack(( G_cn * self.pol_cosmphi_scalar, G_cn * self.pol_sinmphi_scalar))
-
-        Bn     = Gn.dot(np.vstack((self.pol_c, self.pol_s)))
-        Bn_n, Bn_s = np.split(Bn, 2)
-
-        return Bn_n.min(), Bn_s.min(), Bn_n.max(), Bn_s.max()
+        # the indices only depend on the grid and the coefficients, so the last result is reused 
+        # if the coefficients are unchanged (the cache is reset when the matrices are recalculated):
+        if self._AE_cache is not None:
+            pol_c, pol_s, AE = self._AE_cache
+            if np.array_equal(pol_c, self.pol_c) and np.array_equal(pol_s, self.pol_s):
+                return AE
+
+        G_cn   = self._radial_factor.T
+
+        if self._pol_sign_scalar is None:
+            Bn = _sh_sum(self.pol_dP_scalar, self.pol_cosmphi_scalar, self.pol_sinmphi_scalar, G_cn * self.pol_c, G_cn * self.pol_s)
+            Bn_n, Bn_s = _split_hemispheres(Bn)
+        else: 
+            # symmetric grid: evaluate both hemispheres with the northern half of the matrices, with the
+            # southern coefficients multiplied by -(-1)^(n + m), since dP/dlat changes sign with P_n^m(-x):
+            dP_n, cos_n, sin_n = [x[:x.shape[0] // 2] for x in (self.pol_dP_scalar, self.pol_cosmphi_scalar, self.pol_sinmphi_scalar)]
+            G_cs = (-(-1.) ** (self.n_P + self.m_P).T * G_cn).astype(self._dtype)
+            T    = self.pol_c.shape[1]
+            Bn   = _sh_sum(dP_n, cos_n, sin_n, np.hstack((G_cn * self.pol_c, G_cs * self.pol_c)), 
+                                               np.hstack((G_cn * self.pol_s, G_cs * self.pol_s)))
+            Bn_n, Bn_s = Bn[:, :T], Bn[:, T:]
+
+        AE = tuple(_reshape_batch(x, ()) for x in (Bn_n.min(axis = 0), Bn_s.min(axis = 0), Bn_n.max(axis = 0), Bn_s.max(axis = 0)))
+        for x in AE:
+            if isinstance(x, np.ndarray):
+                x.setflags(write = False)
+
+        self._AE_cache = (self.pol_c.copy(), self.pol_s.copy(), AE)
+        return AE
 
 
     def plot_currents(self, vector_scale = 200):
@@ -1338,24 +1819,21 @@ class AMPS(object):
         pax_s.write(self.minlat-5, 12, r'South' , ha = 'center', va = 'center', size = 18)
 
         # calculate and plot FAC
-        Jun, Jus = np.split(self.get_upward_current(), 2)
+        Jun, Jus = _split_hemispheres(self.get_upward_current())
         faclevels = np.r_[-.925:.926:.05]
         pax_n.contourf(mlats, mlts, Jun, levels = faclevels, cmap = plt.cm.bwr, extend = 'both')
         pax_s.contourf(mlats, mlts, Jus, levels = faclevels, cmap = plt.cm.bwr, extend = 'both')
 
         # Total horizontal
         j_e, j_n = self.get_total_current()
-        nn, ns = np.split(j_n, 2)
-        en, es = np.split(j_e, 2)
+        nn, ns = _split_hemispheres(j_n)
+        en, es = _split_hemispheres(j_e)
         pax_n.featherplot(mlatv, mltv, nn , en, SCALE = vector_scale, markersize = 10, unit = 'mA/m', linewidth = .5, color = 'gray', markercolor = 'grey')
         pax_s.featherplot(mlatv, mltv, -ns, es, SCALE = vector_scale, markersize = 10, unit = None  , linewidth = .5, color = 'gray', markercolor = 'grey')
 
 
         # colorbar
-        pax_c.contourf(np.vstack((np.zeros_like(faclevels), np.ones_like(faclevels))), 
-                       np.vstack((faclevels, faclevels)), 
-                       np.vstack((faclevels, faclevels)), 
-                       levels = faclevels, cmap = plt.cm.bwr)
+        ColorbarBase(pax_c, cmap = plt.cm.bwr, norm = BoundaryNorm(faclevels, plt.cm.bwr.N), boundaries = faclevels, orientation = 'vertical')
         pax_c.set_xticks([])
         pax_c.set_ylabel(r'downward    $\mu$A/m$^2$      upward', size = 18)
         pax_c.yaxis.set_label_position("right")
@@ -1416,7 +1894,7 @@ class AMPS(object):
         pmlats, pmlts = pmlats.ravel(), pmlts.ravel()
         pmlatv, pmltv = pmlatv.ravel(), pmltv.ravel()
 
-        mlats, mlts, mlatv, mltv = map(lambda x: x.flatten(), [mlats, mlts, mlatv, mltv])
+        mlats, mlts, mlatv, mltv = map(np.ravel, [mlats, mlts, mlatv, mltv])
 
         # set up figure and polar coordinate plots:
         plt.figure(figsize = (15, 7))
@@ -1461,17 +1939,14 @@ class AMPS(object):
                 vstep = 5
 
             mag = np.sqrt(deltaBs[0]**2+deltaBs[1]**2+deltaBs[2]**2)
-            Jun, Jus = np.split(mag, 2)
+            Jun, Jus = _split_hemispheres(mag)
             # faclevels = np.r_[-.925:.926:.05]
             faclevels = np.r_[vmin:vmax:vstep]
             pax_n.contourf(pmlats, pmlts, Jun, levels = faclevels, cmap = plt.cm.magma, extend = 'upper')
             pax_s.contourf(pmlats, pmlts, Jus, levels = faclevels, cmap = plt.cm.magma, extend = 'upper')
             
             # colorbar
-            pax_c.contourf(np.vstack((np.zeros_like(faclevels), np.ones_like(faclevels))), 
-                           np.vstack((faclevels, faclevels)), 
-                           np.vstack((faclevels, faclevels)), 
-                           levels = faclevels, cmap = plt.cm.magma)
+            ColorbarBase(pax_c, cmap = plt.cm.magma, norm = BoundaryNorm(faclevels, plt.cm.magma.N), boundaries = faclevels, orientation = 'vertical')
             pax_c.set_xticks([])
             pax_c.set_ylabel(r'nT', size = 18)
             pax_c.yaxis.set_label_position("right")
@@ -1486,17 +1961,14 @@ class AMPS(object):
             if vstep is None:
                 vstep = 5
 
-            Jun, Jus = np.split(deltaBs[2], 2)
+            Jun, Jus = _split_hemispheres(deltaBs[2])
             # faclevels = np.r_[-.925:.926:.05]
             faclevels = np.r_[vmin:vmax:vstep]
             pax_n.contourf(pmlats, pmlts, Jun, levels = faclevels, cmap = plt.cm.bwr, extend = 'both')
             pax_s.contourf(pmlats, pmlts, Jus, levels = faclevels, cmap = plt.cm.bwr, extend = 'both')
 
             # colorbar
-            pax_c.contourf(np.vstack((np.zeros_like(faclevels), np.ones_like(faclevels))), 
-                           np.vstack((faclevels, faclevels)), 
-                           np.vstack((faclevels, faclevels)), 
-                           levels = faclevels, cmap = plt.cm.bwr)
+            ColorbarBase(pax_c, cmap = plt.cm.bwr, norm = BoundaryNorm(faclevels, plt.cm.bwr.N), boundaries = faclevels, orientation = 'vertical')
             pax_c.set_xticks([])
             pax_c.set_ylabel(r'downward    nT      upward', size = 18)
             pax_c.yaxis.set_label_position("right")
@@ -1504,8 +1976,8 @@ class AMPS(object):
     
         # Total horizontal
         j_e, j_n = deltaBv[0], deltaBv[1]
-        nn, ns = np.split(j_n, 2)
-        en, es = np.split(j_e, 2)
+        nn, ns = _split_hemispheres(j_n)
+        en, es = _split_hemispheres(j_e)
         pax_n.featherplot(pmlatv, pmltv, nn , en, SCALE = vector_scale, markersize = 10, unit = 'nT', linewidth = .5, color = 'gray', markercolor = 'grey')
         pax_s.featherplot(pmlatv, pmltv, ns, es, SCALE = vector_scale, markersize = 10, unit = None  , linewidth = .5, color = 'gray', markercolor = 'grey')
 
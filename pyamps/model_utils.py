@@ -1,7 +1,6 @@
 import numpy as np
 import pandas as pd
 import os
-from functools import reduce
 
 basepath = os.path.dirname(__file__)
 
@@ -70,17 +69,22 @@ def get_model_vectors(v, By, Bz, tilt, f107, epsilon_multiplier = 1., coeff_fn =
         returns column vectors ((K,1)-shaped) corresponding to the spherical harmonic coefficients of the toroidal
         and poloidal parts, with _c and _s denoting cos and sin terms, respectively.
 
+        The inputs can also be arrays (they will be flattened and broadcast against each other). 
+        The output is then (K,T)-shaped, with one column for each of the T sets of inputs.
+
         This function is used by amps.AMPS class
     """
 
     coeffs = get_coeffs(coeff_fn)
 
+    v, By, Bz, tilt, f107 = np.broadcast_arrays(*[np.asarray(x, dtype = np.float64).reshape(-1) for x in (v, By, Bz, tilt, f107)])
+
     ca = np.arctan2(By, Bz)
     epsilon = np.abs(v)**(4/3.) * np.sqrt(By**2 + Bz**2)**(2/3.) * (np.sin(ca/2)**(8))**(1/3.) / 1000 * epsilon_multiplier # Newell coupling           
     tau     = np.abs(v)**(4/3.) * np.sqrt(By**2 + Bz**2)**(2/3.) * (np.cos(ca/2)**(8))**(1/3.) / 1000 # Newell coupling - inverse 
 
     # make a dict of the 19 external parameters, where the keys are postfixes in the column names of coeffs:
-    external_params = {'const'             : 1                          ,                            
+    external_params = {'const'             : np.ones_like(v)            ,                            
                        'sinca'             : 1              * np.sin(ca),
                        'cosca'             : 1              * np.cos(ca),
                        'epsilon'           : epsilon                    ,
@@ -99,16 +103,26 @@ def get_model_vectors(v, By, Bz, tilt, f107, epsilon_multiplier = 1., coeff_fn =
                        'tilt_tau_sinca'    : tilt * tau     * np.sin(ca),
                        'tilt_tau_cosca'    : tilt * tau     * np.cos(ca),
                        'f107'              : f107                        }
+    external_params = np.vstack([external_params[param] for param in names]) # (19, T)
+
+    # The SH coefficients are the sums in the expansion in terms of external parameters, scaled by the ext. params.
+    # This is done for all T sets of inputs with one matrix product. Coefficients that are missing (NaN) for some
+    # parameter are dropped for the cos terms and set to zero for the sin terms:
+    def expand(prefix):
+        m_matrix = coeffs.loc[:, [prefix + param for param in names]].values
+        missing  = np.isnan(m_matrix).any(axis = 1)
+        return np.where(missing[:, np.newaxis], 0, np.nan_to_num(m_matrix).dot(external_params)), missing
+
+    tor_c, tor_missing = expand('tor_c_')
+    tor_s, _           = expand('tor_s_')
+    pol_c, pol_missing = expand('pol_c_')
+    pol_s, _           = expand('pol_s_')
 
-    # The SH coefficients are the sums in the expansion in terms of external parameters, scaled by the ext. params.:
-    tor_c = reduce(lambda x, y: x+y, [coeffs.loc[:, 'tor_c_' + param] * external_params[param] for param in external_params.keys()]).dropna()
-    tor_s = reduce(lambda x, y: x+y, [coeffs.loc[:, 'tor_s_' + param] * external_params[param] for param in external_params.keys()]).fillna(0)
-    pol_c = reduce(lambda x, y: x+y, [coeffs.loc[:, 'pol_c_' + param] * external_params[param] for param in external_params.keys()]).dropna()
-    pol_s = reduce(lambda x, y: x+y, [coeffs.loc[:, 'pol_s_' + param] * external_params[param] for param in external_params.keys()]).fillna(0)
-    pol_s = pol_s.loc[pol_c.index] # equal number of sin and cos terms, but sin coeffs will be 0 where m = 0
-    tor_s = tor_s.loc[tor_c.index] # 
+    # equal number of sin and cos terms, but sin coeffs will be 0 where m = 0
+    tor_c, tor_s = tor_c[~tor_missing], tor_s[~tor_missing]
+    pol_c, pol_s = pol_c[~pol_missing], pol_s[~pol_missing]
 
 
-    return tor_c.values[:, np.newaxis], tor_s.values[:, np.newaxis], pol_c.values[:, np.newaxis], pol_s.values[:, np.newaxis], pol_c.index.values, tor_c.index.values
+    return tor_c, tor_s, pol_c, pol_s, coeffs.index.values[~pol_missing], coeffs.index.values[~tor_missing]
 
 
@@ -35,6 +35,11 @@ import numpy as np
 import apexpy
 from .mlt_utils import mlon_to_mlt
 from builtins import range
+try:
+    import numba
+    from numba import prange
+except ImportError: # numba is optional, and only used to speed up the Legendre recursion
+    numba = None
 
 d2r = np.pi/180
 
@@ -159,10 +164,46 @@ def nterms(NT = 0, MT = 0, NVi = 0, MVi = 0, NVe = 0, MVe = 0):
 
 
 
+_legendre_coefficients_cache = {}
+
+def _legendre_coefficients(nmax, mmax):
+    """ return coefficients of the recursion for Schmidt semi-normalized Legendre functions:
+
+        P[n, m] = a[n, m] * cos(theta) * P[n - 1, m] - b[n, m] * P[n - 2, m]
+        P[m, m] = d[m] * sin(theta) * P[m - 1, m - 1]
+
+        and the Schmidt normalization factors S[n, m]. The arrays are (nmax + 1, mmax + 1), 
+        and they are cached, since they only depend on nmax and mmax
+    """
+
+    if (nmax, mmax) not in _legendre_coefficients_cache:
+        n, m = np.meshgrid(np.arange(nmax + 1, dtype = np.float64), np.arange(mmax + 1, dtype = np.float64), indexing = 'ij')
+        nm = np.sqrt(np.maximum(n**2 - m**2, 1)) # only used where n > m
+        a = (2*n - 1) / nm
+        b = np.sqrt(np.maximum((n - 1)**2 - m**2, 0)) / nm
+
+        d = np.ones(mmax + 1)
+        d[2:] = np.sqrt((2*m[0, 2:] - 1) / (2*m[0, 2:]))
+
+        S = np.zeros((nmax + 1, mmax + 1))
+        S[0, 0] = 1.
+        for nn in range(1, nmax + 1):
+            S[nn, 0] = S[nn - 1, 0] * (2.*nn - 1)/nn
+            for mm in range(1, min(nn, mmax) + 1):
+                S[nn, mm] = S[nn, mm - 1] * np.sqrt((nn - mm + 1)*(int(mm == 1) + 1.)/(nn + mm))
+
+        _legendre_coefficients_cache[nmax, mmax] = a, b, d, S
+
+    return _legendre_coefficients_cache[nmax, mmax]
+
+
 def legendre(nmax, mmax, theta, schmidtnormalize = True, keys = None):
     """ Calculate associated Legendre function P and its derivative
 
-        Algorithm from "Spacecraft Attitude Determination and Control" by James Richard Wertz
+        The Schmidt semi-normalized functions are calculated with a three-term recursion in n 
+        for each m, with precomputed coefficients (see _legendre_coefficients). This is stable 
+        to high degree, and only needs multiplications and additions in the inner loop. The
+        recursion is compiled with numba if it is available (see _legendre_array).
 
 
         Parameters
@@ -198,65 +239,107 @@ def legendre(nmax, mmax, theta, schmidtnormalize = True, keys = None):
 
     """
 
-    theta = theta.flatten()[:, np.newaxis]
+    P_arr, dP_arr = _legendre_array(nmax, mmax, theta)
 
-    P = {}
-    dP = {}
-    sinth = np.sin(d2r*theta)
-    costh = np.cos(d2r*theta)
+    if not schmidtnormalize:
+        # remove the Schmidt normalization
+        S = _legendre_coefficients(nmax, mmax)[3]
+        S = np.where(S > 0, S, 1.)
+        P_arr  /= S
+        dP_arr /= S
 
-    if schmidtnormalize:
-        S = {}
-        S[0, 0] = 1.
+    if keys is None:
+        P, dP = {}, {}
+        zeros = np.zeros((P_arr.shape[0], 1))
+        for n in range(nmax + 1):
+            for m in range(nmax + 1):
+                P[n, m]  = P_arr[ :, n, m, np.newaxis] if m <= mmax else zeros.copy()
+                dP[n, m] = dP_arr[:, n, m, np.newaxis] if m <= mmax else zeros.copy()
+        return P, dP
+    else:
+        # gather the columns in the order of keys, in one contiguous (N, 2M) array:
+        nm = np.array([key for key in keys]).reshape((-1, 2))
+        n, m = nm.T
+
+        # same keys as in the dict output: 0 <= n, m <= nmax, with zeros where m > mmax
+        invalid = (n < 0) | (n > nmax) | (m < 0) | (m > nmax)
+        if np.any(invalid):
+            raise KeyError(tuple(nm[np.argmax(invalid)].tolist()))
+
+        index = n * (mmax + 1) + np.minimum(m, mmax)
+        N = P_arr.shape[0]
+        PdP = np.hstack((np.take(P_arr.reshape((N, -1)), index, axis = 1), np.take(dP_arr.reshape((N, -1)), index, axis = 1)))
+        PdP[:, np.tile(m > mmax, 2)] = 0.
+        return PdP
+
+
+def _legendre_kernel(costh, sinth, a, b, d, P, dP):
+    """ 
+    Fill the (N, nmax + 1, mmax + 1) arrays P and dP with the Schmidt semi-normalized Legendre
+    functions and their derivatives with respect to colatitude, one point at a time, with 
+    the recursion coefficients a, b, d from _legendre_coefficients. P and dP must be zero
+    on input. The function is compiled with numba if it is available
+    """
 
-    # initialize the functions:
-    for n in range(nmax +1):
-        for m in range(nmax + 1):
-            P[n, m] = np.zeros_like(theta, dtype = np.float64)
-            dP[n, m] = np.zeros_like(theta, dtype = np.float64)
-
-    P[0, 0] = np.ones_like(theta, dtype = np.float64)
-    for n in range(1, nmax +1):
-        for m in range(0, min([n + 1, mmax + 1])):
-            # do the legendre functions and derivatives
-            if n == m:
-                P[n, n]  = sinth * P[n - 1, m - 1]
-                dP[n, n] = sinth * dP[n - 1, m - 1] + costh * P[n - 1, n - 1]
-            else:
-
-                if n == 1:
-                    Knm = 0.
-                    P[n, m]  = costh * P[n -1, m]
-                    dP[n, m] = costh * dP[n - 1, m] - sinth * P[n - 1, m]
-
-                elif n > 1:
-                    Knm = ((n - 1)**2 - m**2) / ((2*n - 1)*(2*n - 3))
-                    P[n, m]  = costh * P[n -1, m] - Knm*P[n - 2, m]
-                    dP[n, m] = costh * dP[n - 1, m] - sinth * P[n - 1, m] - Knm * dP[n - 2, m]
-
-            if schmidtnormalize:
-                # compute Schmidt normalization
-                if m == 0:
-                    S[n, 0] = S[n - 1, 0] * (2.*n - 1)/n
-                else:
-                    S[n, m] = S[n, m - 1] * np.sqrt((n - m + 1)*(int(m == 1) + 1.)/(n + m))
-
-
-    if schmidtnormalize:
-        # now apply Schmidt normalization
-        for n in range(1, nmax + 1):
-            for m in range(0, min([n + 1, mmax + 1])):
-                P[n, m]  *= S[n, m]
-                dP[n, m] *= S[n, m]
+    nmax, mmax = a.shape[0] - 1, a.shape[1] - 1
 
+    for i in prange(costh.size):
+        P[i, 0, 0] = 1.
+        for m in range(min(nmax, mmax) + 1):
+            if m > 0:
+                P[i, m, m]  = d[m] * sinth[i] * P[i, m - 1, m - 1]
+                dP[i, m, m] = d[m] * (sinth[i] * dP[i, m - 1, m - 1] + costh[i] * P[i, m - 1, m - 1])
+            for n in range(m + 1, nmax + 1):
+                P[i, n, m]  = a[n, m] * costh[i] * P[i, n - 1, m]
+                dP[i, n, m] = a[n, m] * (costh[i] * dP[i, n - 1, m] - sinth[i] * P[i, n - 1, m])
+                if n > m + 1:
+                    P[i, n, m]  -= b[n, m] * P[i, n - 2, m]
+                    dP[i, n, m] -= b[n, m] * dP[i, n - 2, m]
 
-    if keys is None:
+
+if numba is not None:
+    _legendre_kernel = numba.njit(parallel = True, fastmath = True, cache = True)(_legendre_kernel)
+else:
+    _legendre_kernel = None
+
+
+def _legendre_array(nmax, mmax, theta, xp = np):
+    """ return the Schmidt semi-normalized Legendre functions P and their derivatives dP/dtheta 
+        at colatitudes theta (degrees), as (N, nmax + 1, mmax + 1) arrays indexed [point, n, m]
+
+        xp is the array module that the arrays are made with. With another module than numpy 
+        (e.g. cupy), the vectorized recursion is used, so that the arrays are made on its device
+    """
+
+    theta = xp.asarray(theta, dtype = xp.float64).flatten()
+    sinth = xp.sin(d2r*theta)
+    costh = xp.cos(d2r*theta)
+
+    a, b, d, S = _legendre_coefficients(nmax, mmax)
+
+    P  = xp.zeros((theta.size, nmax + 1, mmax + 1))
+    dP = xp.zeros((theta.size, nmax + 1, mmax + 1))
+
+    if _legendre_kernel is not None and xp is np:
+        _legendre_kernel(costh, sinth, a, b, d, P, dP)
         return P, dP
-    else:
-        Pmat  = np.hstack(tuple(P[key] for key in keys))
-        dPmat = np.hstack(tuple(dP[key] for key in keys)) 
-    
-        return np.hstack((Pmat, dPmat))
+
+    # Same recursion, vectorized over the points. m is in the outer loop; the sectoral terms 
+    # are found from P[m - 1, m - 1], and then the recursion runs upward in n for fixed m:
+    P[:, 0, 0] = 1.
+    for m in range(0, min(nmax, mmax) + 1):
+        if m > 0:
+            P[:, m, m]  = d[m] * sinth * P[:, m - 1, m - 1]
+            dP[:, m, m] = d[m] * (sinth * dP[:, m - 1, m - 1] + costh * P[:, m - 1, m - 1])
+
+        for n in range(m + 1, nmax + 1):
+            P[:, n, m]  = a[n, m] * costh * P[:, n - 1, m]
+            dP[:, n, m] = a[n, m] * (costh * dP[:, n - 1, m] - sinth * P[:, n - 1, m])
+            if n > m + 1:
+                P[:, n, m]  -= b[n, m] * P[:, n - 2, m]
+                dP[:, n, m] -= b[n, m] * dP[:, n - 2, m]
+
+    return P, dP
 
 
 def getG0(glat, glon, height, time, epoch = 2015., h_R = 110., NT = 65, MT = 3, NV = 45, MV = 3,
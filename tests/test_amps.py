@@ -66,6 +66,85 @@ class Test_AMPS(object):
         with pytest.raises(AssertionError):
             assert_allclose(old_tor_c, new_tor_c, atol=1e-5)
 
+    def test_float32_precision(self, amps_model):
+        model, m_args, m_kwargs = amps_model
+
+        model32 = AMPS(*m_args, precision = 'float32', **m_kwargs)
+        assert model32.tor_A_scalar.dtype == model32.tor_cs.dtype == np.float32
+
+        for f in ['get_toroidal_scalar', 'get_poloidal_scalar', 'get_upward_current', 'get_total_current_magnitude']:
+            ref = getattr(model, f)()
+            assert_allclose(getattr(model32, f)(), ref, atol = 1e-5 * np.abs(ref).max())
+
+        AE = model32.get_AE_indices()
+        assert all(x.dtype == np.float32 for x in AE)
+        assert_allclose(AE, model.get_AE_indices(), rtol = 1e-5)
+
+    @pytest.mark.parametrize("precision", ['int64', 'float16', 'complex128'])
+    def test_precision(self, amps_model, precision):
+        model, m_args, m_kwargs = amps_model
+
+        with pytest.raises(ValueError):
+            AMPS(*m_args, precision = precision, **m_kwargs)
+
+    def test_single_point_scalargrid(self, amps_model):
+        model, m_args, m_kwargs = amps_model
+
+        # a scalargrid with one mlat and mlt per hemisphere has no area elements, but the model can be made:
+        model = AMPS(*m_args, **dict(m_kwargs, resolution = 1))
+        assert model.get_upward_current().shape == (2, 1)
+        with pytest.raises(IndexError):
+            model.get_integrated_upward_current()
+
+    def test_backend(self, amps_model):
+        model, m_args, m_kwargs = amps_model
+
+        with pytest.raises(ValueError):
+            AMPS(*m_args, backend = 'not_a_backend', **m_kwargs)
+
+        pytest.importorskip('cupy')
+        model_gpu = AMPS(*m_args, backend = 'cupy', **m_kwargs)
+        assert_allclose(model_gpu.get_upward_current(), model.get_upward_current())
+        assert_allclose(model_gpu.get_all_scalars(), model.get_all_scalars())
+        assert_allclose(model_gpu.get_ground_perturbation(), model.get_ground_perturbation())
+
+    def test_update_model_batch(self, amps_model):
+        model, m_args, m_kwargs = amps_model
+        mlat, mlt = np.array([[75., -72.], [80., 73.]]), np.array([[3., 12.], [18., 21.]])
+
+        batch_args = [np.array([x, 2 * x, 3 * x]) for x in m_args]
+        model.update_model(*batch_args)
+        Ju   = model.get_upward_current()
+        j_df = model.get_divergence_free_current(mlat, mlt)
+        J_up = model.get_integrated_upward_current()
+        assert Ju.shape == (model.scalargrid[0].size, 3)
+        assert j_df[0].shape == mlat.shape + (3, )
+
+        for i in range(3):
+            model.update_model(*[x[i] for x in batch_args])
+            assert_allclose(Ju[:, i:i+1], model.get_upward_current())
+            assert_allclose(j_df[1][..., i], model.get_divergence_free_current(mlat, mlt)[1])
+            assert_allclose([J[i] for J in J_up], model.get_integrated_upward_current())
+
+    def test_ground_perturbation_on_grids(self, amps_model):
+        model, _, _ = amps_model
+
+        for mlat, mlt in [model.vectorgrid, model.scalargrid]:
+            assert_allclose(model.get_ground_perturbation(mlat, mlt), model.get_ground_perturbation(mlat.copy(), mlt.copy()))
+
+    def test_get_ground_perturbation_batch(self, amps_model):
+        model, m_args, m_kwargs = amps_model
+        mlat, mlt = np.array([75., -72., 80.]), np.array([3., 12., 18.])
+
+        model.update_model(*[np.array([x, 2 * x]) for x in m_args])
+        dB_batch = model.get_ground_perturbation_batch(model.pol_c.T, model.pol_s.T, mlat, mlt, height = 10.)
+        assert dB_batch[0].shape == (3, 2)
+        assert_allclose(dB_batch, model.get_ground_perturbation(mlat, mlt, height = 10.))
+
+        for i in range(2):
+            model.update_model(*[x * (i + 1) for x in m_args])
+            assert_allclose([dB[:, i:i+1] for dB in dB_batch], model.get_ground_perturbation(mlat, mlt, height = 10.))
+
     def test__get_vectorgrid(self, amps_model):
         model, _, _ = amps_model
 
@@ -107,6 +186,57 @@ class Test_AMPS(object):
         assert_allclose(model.tor_dP_vector[5],
                         [ 0.3090169, -0.9510565,  0.8816778, -1.4012585, -0.5090369], atol=1e-6)
 
+    def test_asymmetric_scalargrid(self, amps_model):
+        model, _, _ = amps_model
+        assert model.tor_A_scalar.shape[0] == model.scalargrid[0].size // 2
+
+        mlat, mlt = model.scalargrid
+        Ju = model.get_upward_current(mlat[:-3], mlt[:-3])
+        model.scalargrid = (mlat[:-3], mlt[:-3])
+        model.calculate_matrices()
+        assert model.tor_A_scalar.shape[0] == model.scalargrid[0].size
+        assert_allclose(Ju, model.get_upward_current())
+
+    def test_AE_indices_asymmetric_scalargrid(self, amps_model):
+        model, _, _ = amps_model
+        AE = model.get_AE_indices()
+
+        # reverse the order of the southern points, which breaks the symmetry but keeps the hemispheres:
+        model.scalargrid = tuple(np.vstack((north, south[::-1])) for north, south in map(np.split, model.scalargrid, (2, 2)))
+        model.calculate_matrices()
+        assert model._pol_sign_scalar is None
+        assert_allclose(model.get_AE_indices(), AE)
+
+    def test_AE_indices_cache(self, amps_model):
+        model, m_args, _ = amps_model
+        AE = model.get_AE_indices()
+        assert model.get_AE_indices() is AE
+
+        m_args[0] += 100
+        model.update_model(*m_args)
+        new_AE = model.get_AE_indices()
+        assert new_AE is not AE
+
+        model._AE_cache = None
+        assert_allclose(model.get_AE_indices(), new_AE)
+
+    def test__legendre_keys(self, amps_model):
+        model, _, _ = amps_model
+        assert (model.N, model.M) == tuple(np.max(model.keys_P + model.keys_T, axis = 0))
+
+        for key in [(model.N + 1, 0), (1, model.M + 1), (1, -1)]:
+            with pytest.raises(KeyError):
+                model._legendre(np.array([75.]), [(1, 0), key])
+
+    def test__legendre_symmetry(self, amps_model):
+        model, _, _ = amps_model
+        mlat = model.scalargrid[0]
+        north, south = np.split(mlat, 2)
+
+        P, dP = model._legendre(mlat, model.keys_P, symmetric = True)
+        assert_allclose(P , np.vstack(model._legendre(north, model.keys_P)[:1] + model._legendre(south, model.keys_P)[:1]))
+        assert_allclose(dP, np.vstack(model._legendre(north, model.keys_P)[1:] + model._legendre(south, model.keys_P)[1:]))
+
     @pytest.mark.parametrize("mlat, mlt", [(np.array([60.]), np.array([0.])),
                                            (np.array([71.]), np.array([6.]))])
     def test_toroidal_scalar(self, amps_model, mlat, mlt):
@@ -332,6 +462,69 @@ class Test_AMPS(object):
 
         pass
 
+    def test_currents_without_numba(self, amps_model, monkeypatch):
+        model, _, m_kwargs = amps_model
+        mlat, mlt = model.vectorgrid
+
+        monkeypatch.setattr(pyamps.amps, '_CACHE_MAX_POINTS', 0) # use the numba kernel if available
+        j_df = model.get_divergence_free_current(mlat, mlt)
+        j_cf = model.get_curl_free_current(mlat, mlt)
+        dB   = model.get_ground_perturbation(mlat, mlt)
+
+        monkeypatch.setattr(pyamps.amps, '_evaluate_field', None)
+        assert_allclose(j_df, model.get_divergence_free_current(mlat, mlt))
+        assert_allclose(j_cf, model.get_curl_free_current(mlat, mlt))
+        assert_allclose(dB, model.get_ground_perturbation(mlat, mlt))
+
+        pass
+
+    def test__device_matrices(self, amps_model):
+        model, _, _ = amps_model
+        mlat, mlt = np.array([[75.], [-72.], [90.]]), np.array([[3.], [12.], [18.]])
+
+        # with numpy as the array module, the arrays are the same as on the CPU path used for the other backends:
+        for kind in ['pol', 'tor']:
+            assert_allclose(model._device_matrices(kind, mlat, mlt, np), model._custom_matrices(kind, mlat, mlt), atol = 1e-12)
+
+    def test_grid_output_shape(self, amps_model):
+        model, _, _ = amps_model
+        mlat, mlt = np.array([75.]), np.array([3., 12., 18.])
+
+        Ju = model.get_upward_current(mlat, mlt, grid = True)
+        assert Ju.shape == (1, 3)
+        assert_allclose(Ju[0], model.get_upward_current(np.full(3, 75.), mlt))
+
+        j_e, j_n = model.get_total_current(mlat, mlt, grid = True)
+        assert j_e.shape == j_n.shape == (1, 3)
+
+    def test_custom_cache(self, amps_model):
+        model, _, m_kwargs = amps_model
+        mlat, mlt = np.array([75., -72., 80.]), np.array([3., 12., 18.])
+
+        Ju = model.get_upward_current(mlat, mlt)
+        assert len(model._custom_cache) == 1
+        assert_allclose(Ju, model.get_upward_current(mlat, mlt))
+        assert len(model._custom_cache) == 1
+
+        model.get_upward_current(mlat + 1, mlt)
+        assert len(model._custom_cache) == 2
+        assert_allclose(Ju, model.get_upward_current(mlat, mlt))
+
+        pass
+
+    def test_get_all_scalars(self, amps_model):
+        model, _, m_kwargs = amps_model
+
+        T, V, Psi, Ju, alpha = model.get_all_scalars()
+
+        assert_allclose(T    , model.get_toroidal_scalar())
+        assert_allclose(V    , model.get_poloidal_scalar())
+        assert_allclose(Psi  , model.get_divergence_free_current_function())
+        assert_allclose(Ju   , model.get_upward_current())
+        assert_allclose(alpha, model.get_curl_free_current_potential())
+
+        pass
+
     def test_get_integrated_upward_current(self, amps_model):
         model, _, m_kwargs = amps_model
         mlt2r = pi / 12
@@ -423,3 +616,26 @@ def test_get_B_ground():
     assert_allclose(Bqlambda, 1.973, atol=1e-3)
     assert_allclose(Bqr, 1.433, atol=1e-3)
     pass
+
+
+def test_currents_at_poles(monkeypatch):
+    # the test model has no terms that depend on 1/cos(mlat) at the poles, so the full model is used:
+    model = AMPS(350, 3, -4, 10, 100)
+    functions = [model.get_divergence_free_current, model.get_curl_free_current, model.get_ground_perturbation]
+    coords = [(np.array([90.]), np.array([3.])), (np.array([-90.]), np.array([3.]))]
+    results = [[f(mlat, mlt) for f in functions] for mlat, mlt in coords]
+    assert np.abs(results[1][0][1]) > 1 # the 1/cos(mlat) terms are not suppressed at the south pole
+
+    # cos(+-90 degrees) is not exactly zero, and the results should be the same as with 1/cos(mlat):
+    monkeypatch.setattr(pyamps.amps, '_secant', lambda mlat: 1. / cos(np.asarray(mlat) * pi / 180))
+    for (mlat, mlt), result in zip(coords, results):
+        for f, out in zip(functions, result):
+            assert_allclose(out, f(mlat, mlt))
+
+    # the values at a pole should not depend on the other points in the call:
+    monkeypatch.undo()
+    mlat, mlt = np.array([90., -90.]), np.array([3., 3.])
+    assert_allclose(np.ravel(model.get_divergence_free_current(mlat, mlt)), [70.227, 32.341, 0., -45.077], atol=1e-3)
+    assert_allclose(np.ravel(model.get_curl_free_current(mlat, mlt)), [0., -109.242, 65.490, -16.510], atol=1e-3)
+    assert_allclose(np.ravel(model.get_ground_perturbation(mlat, mlt)), [0., 24.559, 42.893, 22.115], atol=1e-3)
+    pass
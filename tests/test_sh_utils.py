@@ -166,6 +166,37 @@ def test_legendre(inp, out):
     # assert_allclose(PdP[:, inp[5]].sum(), out[2], rtol=1e-4, atol=1e-14)
     # assert_allclose(PdP[inp[4], inp[1]:].sum(), out[3], rtol=1e-4, atol=1e-14)
 
+def test_legendre_schmidt():
+    from scipy.special import lpmv, factorial
+    theta = np.linspace(1, 179, 13)
+    P, dP = legendre(30, 4, theta)
+
+    for n, m in SHkeys(30, 4).MleN():
+        S = np.sqrt((2. - (m == 0)) * factorial(n - m) / factorial(n + m))
+        assert_allclose(P[n, m].flatten(), (-1)**m * S * lpmv(m, n, np.cos(theta * np.pi / 180)), rtol=1e-9, atol=1e-12)
+
+def test_legendre_without_numba(monkeypatch):
+    import pyamps.sh_utils
+    theta = np.linspace(1, 179, 13)
+    keys = SHkeys(30, 4).MleN()
+    PdP = legendre(30, 4, theta, keys=keys)
+
+    monkeypatch.setattr(pyamps.sh_utils, '_legendre_kernel', None)
+    assert_allclose(legendre(30, 4, theta, keys=keys), PdP, rtol=1e-9, atol=1e-12)
+
+def test_legendre_keys_out_of_range():
+    theta = np.linspace(1, 179, 13)
+    P, dP = legendre(5, 2, theta)
+
+    # orders above mmax give zeros, as in the dict output:
+    PdP = legendre(5, 2, theta, keys=[(3, 3), (4, 0), (5, 5)])
+    assert_allclose(PdP, np.hstack((P[3, 3], P[4, 0], P[5, 5], dP[3, 3], dP[4, 0], dP[5, 5])))
+    assert np.all(PdP[:, [0, 2, 3, 5]] == 0)
+
+    for key in [(3, -1), (6, 0), (3, 6), (-1, 0)]:
+        with pytest.raises(KeyError):
+            legendre(5, 2, theta, keys=[(1, 0), key])
+
 @pytest.mark.apex_dep
 def test_getG0():
     glat = np.array([80, 10])